@@ -15,6 +15,7 @@ from .serializers import (
 from accounts.permissions import IsAdminOrSuperAdmin
 from accounts.models import CustomUser, Profile, Organization
 from core.models import Office
+from core.summary import batched_summary_refresh
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework.parsers import MultiPartParser, FormParser
 
@@ -185,7 +186,9 @@ class DeleteUserView(APIView):
     def delete(self, request, user_id):
         try:
             user = CustomUser.objects.get(id=user_id)
-            user.delete()
+            # The user's inventory rows are deleted with them; refresh their summary once
+            with batched_summary_refresh():
+                user.delete()
             return Response({"message": "User deleted successfully."}, status=200)
         except CustomUser.DoesNotExist:
             return Response(
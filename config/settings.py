@@ -202,9 +202,38 @@ STATIC_URL = "static/"
 STATIC_ROOT = BASE_DIR / "staticfiles"
 STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
+# Spooled import uploads are read back by the `worker` process (see Procfile). When web and
+# worker run on separate machines or dynos, MEDIA_ROOT must be shared between them, or the
+# default storage must be a shared backend such as S3.
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
+# Rendered report cache (broadsheets, exports)
+REPORT_CACHE_DIR = os.environ.get("REPORT_CACHE_DIR", os.path.join(BASE_DIR, "report_cache"))
+REPORT_CACHE_MAX_BYTES = int(os.getenv("REPORT_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+REPORT_CACHE_LOCK_TIMEOUT = int(os.getenv("REPORT_CACHE_LOCK_TIMEOUT", 300))  # seconds
+
+# Processes used to render report shards in parallel (1 renders them serially)
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", min(4, os.cpu_count() or 1)))
+
+# Import upload limits, checked before an upload is parsed. Uploads over Django's
+# FILE_UPLOAD_MAX_MEMORY_SIZE (2.5 MB) are already spooled to disk by the upload handler.
+IMPORT_MAX_UPLOAD_BYTES = int(os.getenv("IMPORT_MAX_UPLOAD_BYTES", 20 * 1024 * 1024))
+IMPORT_MAX_UNPACKED_BYTES = int(os.getenv("IMPORT_MAX_UNPACKED_BYTES", 200 * 1024 * 1024))
+IMPORT_MAX_ROWS = int(os.getenv("IMPORT_MAX_ROWS", 50000))  # rows per sheet
+
+# Import jobs still running after this many seconds are assumed to belong to a worker that
+# died; they are requeued, or failed once they have been claimed IMPORT_JOB_MAX_ATTEMPTS times
+IMPORT_JOB_TIMEOUT = int(os.getenv("IMPORT_JOB_TIMEOUT", 60 * 60))
+IMPORT_JOB_MAX_ATTEMPTS = int(os.getenv("IMPORT_JOB_MAX_ATTEMPTS", 3))
+
+# Days deletion tombstones are kept for delta export clients (see `prune_tombstones`)
+DELTA_TOMBSTONE_RETENTION_DAYS = int(os.getenv("DELTA_TOMBSTONE_RETENTION_DAYS", 90))
+
+# Seconds the delta export stays behind the clock. Timestamps are taken before their write
+# commits, so this must exceed the longest write transaction (e.g. a large import)
+DELTA_SETTLE_SECONDS = int(os.getenv("DELTA_SETTLE_SECONDS", 300))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
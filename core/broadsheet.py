@@ -0,0 +1,392 @@
+"""
+Helpers for building the inventory broadsheet.
+"""
+from decimal import Decimal
+from functools import lru_cache
+from itertools import groupby
+from operator import itemgetter
+
+from django.db import connection
+from django.db.models import DecimalField, ExpressionWrapper, F, Max, Sum
+
+from .cache import inventory_version
+from .models import BroadsheetSummary, InventoryItem, InventoryTombstone, ItemRegister, Office
+from .reports import ReportWorkbook, Styled
+
+
+CENTS = Decimal("0.01")
+
+
+def money(value):
+    """
+    Normalise a database value to a two-decimal Decimal (SQLite drops trailing zeros).
+    """
+    return Decimal(value or 0).quantize(CENTS)
+
+
+def broadsheet_version(*years):
+    """
+    Return (version, last_modified) describing the data behind the broadsheet of one or
+    more years, without aggregating it.
+
+    The version covers the years' rows. last_modified is the latest change anywhere in the
+    inventory, deletions included through their tombstones: the latest `updated_at` of the
+    years' rows alone moves backwards when a row is deleted or moved to another year, and
+    If-Modified-Since would then answer 304 for changed data.
+    """
+    version, last_modified = inventory_version(InventoryItem.objects.filter(year__in=years))
+    timestamps = [
+        timestamp
+        for timestamp in (
+            last_modified,
+            InventoryItem.objects.aggregate(value=Max("updated_at"))["value"],
+            InventoryTombstone.objects.aggregate(value=Max("deleted_at"))["value"],
+        )
+        if timestamp
+    ]
+    return version, max(timestamps) if timestamps else None
+
+
+def value_expression():
+    """
+    Database expression for quantity x unit cost of a summary row.
+    """
+    return ExpressionWrapper(
+        F("total_quantity") * F("item__unit_cost"),
+        output_field=DecimalField(max_digits=20, decimal_places=2),
+    )
+
+
+def broadsheet_valuation(year):
+    """
+    Compute the per-department value subtotals and the grand total for a year in the database.
+
+    PostgreSQL does it in one ROLLUP query; other backends (SQLite) emulate the rollup with a
+    grouped query plus an aggregate. Returns (department_values, grand_total).
+    """
+    if connection.vendor == "postgresql":
+        query = f"""
+            SELECT o.department, GROUPING(o.department), SUM(s.total_quantity * i.unit_cost)
+            FROM {BroadsheetSummary._meta.db_table} s
+            JOIN {ItemRegister._meta.db_table} i ON i.id = s.item_id
+            JOIN {Office._meta.db_table} o ON o.id = s.office_id
+            WHERE s.year = %s
+            GROUP BY ROLLUP (o.department)
+        """
+        department_values = {}
+        grand_total = money(0)
+        with connection.cursor() as cursor:
+            cursor.execute(query, [year])
+            for department, is_total, value in cursor.fetchall():
+                if is_total:
+                    grand_total = money(value)
+                else:
+                    department_values[department] = money(value)
+        return department_values, grand_total
+
+    summaries = BroadsheetSummary.objects.filter(year=year)
+    department_values = {
+        row["office__department"]: money(row["value"])
+        for row in summaries.values("office__department")
+        .annotate(value=Sum(value_expression()))
+        .order_by()
+    }
+    grand_total = summaries.aggregate(value=Sum(value_expression()))["value"]
+    return department_values, money(grand_total)
+
+
+@lru_cache(maxsize=8)
+def broadsheet_layout(year, version):
+    """
+    Return the (columns, items) layout of a year's pivot: the (department, office) columns in
+    broadsheet order, and the items in broadsheet order as (pk, item_id, name, description,
+    unit_cost, total_quantity) with their totals over all offices.
+
+    Cached per process under the data version from `broadsheet_version`, so a virtualized
+    grid scrolling through a year aggregates it once per change, not once per window.
+    """
+    columns = tuple(
+        BroadsheetSummary.objects.filter(year=year)
+        .values_list("office__department", "office__name")
+        .distinct()
+        .order_by("office__department", "office__name")
+    )
+    items = tuple(
+        ItemRegister.objects.filter(broadsheet_summaries__year=year)
+        .values_list("id", "item_id", "name", "description", "unit_cost")
+        .annotate(total_quantity=Sum("broadsheet_summaries__total_quantity"))
+        .order_by("name", "item_id")
+    )
+    return columns, items
+
+
+class BroadsheetPivot:
+    """
+    Item x office quantity matrix built in a single pass over the aggregated inventory rows.
+
+    `inventory_data` is the output of `BroadsheetView.aggregate_inventory_data` (one row per
+    item and office, ordered by item name, with its database-computed `value`) and
+    `department_offices` is the department -> offices mapping that defines the column
+    order. Rows are produced one item at a time, so only the current row of the matrix is
+    held in memory.
+    """
+
+    def __init__(self, inventory_data, department_offices):
+        self.inventory_data = inventory_data
+        self.offices = [
+            office for offices in department_offices.values() for office in offices
+        ]
+        self.office_index = {office: col for col, office in enumerate(self.offices)}
+
+    def rows(self):
+        """
+        Yield (item, quantities, total_quantity) for every item, in broadsheet order.
+        """
+        for item_id, group in groupby(
+            self.inventory_data, key=itemgetter("item__item_id")
+        ):
+            quantities = [None] * len(self.offices)
+            total_value = money(0)
+            for row in group:
+                col = self.office_index.get(row["office__name"])
+                if col is None:
+                    continue
+                current = quantities[col]
+                quantities[col] = (current or 0) + row["total_quantity"]
+                total_value += money(row["value"])
+
+            item = {
+                "item_id": item_id,
+                "name": row["item__name"],
+                "description": row["item__description"],
+                "unit_cost": money(row["item__unit_cost"]),
+                "total_value": total_value,
+            }
+            yield item, quantities, sum(q for q in quantities if q)
+
+
+def year_changes(values):
+    """
+    Differences between consecutive years' quantities; None where neither year has stock.
+    """
+    return [
+        None if previous is None and current is None else (current or 0) - (previous or 0)
+        for previous, current in zip(values, values[1:])
+    ]
+
+
+class ComparativePivot:
+    """
+    Item x office x year quantity matrix for comparing several years, built in a single pass
+    over the rows of one grouped query (see `BroadsheetView.aggregate_comparative_data`).
+
+    Rows must be ordered by item; `years` is sorted ascending and change columns compare each
+    year with the previous one.
+    """
+
+    def __init__(self, inventory_data, department_offices, years):
+        self.inventory_data = inventory_data
+        self.years = list(years)
+        self.year_index = {year: col for col, year in enumerate(self.years)}
+        self.offices = [
+            office for offices in department_offices.values() for office in offices
+        ]
+        self.office_index = {office: col for col, office in enumerate(self.offices)}
+
+    @property
+    def changes(self):
+        """
+        (previous, current) year pairs a change column is emitted for.
+        """
+        return list(zip(self.years, self.years[1:]))
+
+    def rows(self):
+        """
+        Yield (item, quantities, totals) for every item, in broadsheet order: `quantities`
+        holds one per-year list per office and `totals` the item's total for each year.
+        """
+        for item_id, group in groupby(
+            self.inventory_data, key=itemgetter("item__item_id")
+        ):
+            quantities = [[None] * len(self.years) for _ in self.offices]
+            for row in group:
+                col = self.office_index.get(row["office__name"])
+                if col is None:
+                    continue
+                year_col = self.year_index[row["year"]]
+                current = quantities[col][year_col]
+                quantities[col][year_col] = (current or 0) + row["total_quantity"]
+
+            item = {
+                "item_id": item_id,
+                "name": row["item__name"],
+                "description": row["item__description"],
+            }
+            totals = [
+                sum(office[year_col] or 0 for office in quantities)
+                for year_col in range(len(self.years))
+            ]
+            yield item, quantities, totals
+
+
+def write_broadsheet(
+    output, organization_name, year, department_offices, pivot, valuation
+):
+    """
+    Render the broadsheet into `output` using a write-only report workbook.
+
+    Rows are streamed to disk by openpyxl as they are appended, so memory stays flat
+    regardless of the number of items. Merged ranges are declared as rows are written
+    and output when the workbook is saved. `valuation` is the (department_values,
+    grand_total) pair from `broadsheet_valuation`, written as a closing subtotal row.
+    """
+    num_office_columns = sum(len(offices) for offices in department_offices.values())
+    num_columns = 7 + num_office_columns
+    total_col = 5 + num_office_columns
+    header_row = 3
+
+    workbook = ReportWorkbook(write_only=True)
+    sheet = workbook.sheet("Broadsheet", [20] * num_columns)
+
+    # Header: Organization Name and Subheading: Year
+    sheet.title(organization_name.upper(), "report_banner", num_columns)
+    sheet.title(f"Inventory Data for the Year {year}", "report_banner_subtitle", num_columns)
+
+    # Label columns span both header rows
+    for col in list(range(1, 5)) + [total_col, total_col + 1, total_col + 2]:
+        sheet.merge(header_row, col, header_row + 1, col)
+
+    # Department headers merged across their offices, office names rotated below
+    department_cells = []
+    office_cells = []
+    col_index = 5
+    for department, offices in department_offices.items():
+        if not offices:
+            continue
+        sheet.merge(header_row, col_index, header_row, col_index + len(offices) - 1)
+        department_cells.append(Styled(department, "report_header"))
+        department_cells.extend(Styled(None, "report_header") for _ in offices[1:])
+        office_cells.extend(Styled(office, "report_rotated") for office in offices)
+        col_index += len(offices)
+
+    sheet.append(
+        [
+            Styled(label, "report_header")
+            for label in ("S/N", "ITEM ID", "ITEM NAME", "DESCRIPTION")
+        ]
+        + department_cells
+        + [
+            Styled("TOTAL", "report_label_rotated"),
+            Styled("UNIT", "report_label"),
+            Styled("VALUE", "report_label"),
+        ]
+    )
+    sheet.append([None] * 4 + office_cells)
+
+    # Data rows
+    for serial_number, (item, quantities, total_quantity) in enumerate(
+        pivot.rows(), start=1
+    ):
+        sheet.append(
+            [
+                Styled(serial_number, "report_centered"),
+                item["item_id"],
+                item["name"],
+                item["description"] or "N/A",
+            ]
+            + [Styled(quantity, "report_centered") for quantity in quantities]
+            + [
+                Styled(total_quantity, "report_centered"),
+                Styled(item["unit_cost"], "report_centered"),
+                Styled(item["total_value"], "report_centered"),
+            ]
+        )
+
+    # Per-department subtotals under their offices and the grand total under VALUE
+    department_values, grand_total = valuation
+    sheet.append()
+    row_index = sheet.row_count + 1
+    sheet.merge(row_index, 1, row_index, 4)
+    subtotal_cells = []
+    col_index = 5
+    for department, offices in department_offices.items():
+        if not offices:
+            continue
+        sheet.merge(row_index, col_index, row_index, col_index + len(offices) - 1)
+        subtotal_cells.append(Styled(department_values.get(department, 0), "report_bold"))
+        subtotal_cells.extend([None] * (len(offices) - 1))
+        col_index += len(offices)
+    sheet.append(
+        [Styled("TOTAL VALUE", "report_label"), None, None, None]
+        + subtotal_cells
+        + [None, None, Styled(grand_total, "report_bold")]
+    )
+
+    workbook.save(output)
+
+
+def write_comparative_broadsheet(output, organization_name, pivot):
+    """
+    Render a year-over-year broadsheet from a `ComparativePivot` into `output`.
+
+    Every office (and the closing TOTAL block) gets one column per year followed by one
+    change column per consecutive pair of years; the office name is merged across them.
+    Uses a write-only report workbook, like `write_broadsheet`.
+    """
+    block_labels = [str(year) for year in pivot.years] + [
+        f"CHANGE {previous}-{current}" for previous, current in pivot.changes
+    ]
+    block_width = len(block_labels)
+    num_columns = 4 + block_width * (len(pivot.offices) + 1)
+
+    workbook = ReportWorkbook(write_only=True)
+    sheet = workbook.sheet("Comparison", [20] * 4 + [12] * (num_columns - 4))
+
+    sheet.title(organization_name.upper(), "report_banner", num_columns)
+    years_label = ", ".join(str(year) for year in pivot.years)
+    sheet.title(
+        f"Inventory Comparison for the Years {years_label}",
+        "report_banner_subtitle",
+        num_columns,
+    )
+
+    # Office names merged across their year and change columns
+    header_row = 3
+    for col in range(1, 5):
+        sheet.merge(header_row, col, header_row + 1, col)
+    block_cells = []
+    for block, label in enumerate(pivot.offices + ["TOTAL"]):
+        first_col = 5 + block * block_width
+        sheet.merge(header_row, first_col, header_row, first_col + block_width - 1)
+        block_cells.append(Styled(label, "report_header"))
+        block_cells.extend([None] * (block_width - 1))
+    sheet.append(
+        [
+            Styled(label, "report_header")
+            for label in ("S/N", "ITEM ID", "ITEM NAME", "DESCRIPTION")
+        ]
+        + block_cells
+    )
+    sheet.append(
+        [None] * 4
+        + [
+            Styled(label, "report_bold")
+            for _ in range(len(pivot.offices) + 1)
+            for label in block_labels
+        ]
+    )
+
+    for serial_number, (item, quantities, totals) in enumerate(pivot.rows(), start=1):
+        cells = [
+            Styled(serial_number, "report_centered"),
+            item["item_id"],
+            item["name"],
+            item["description"] or "N/A",
+        ]
+        for values in quantities + [totals]:
+            cells.extend(
+                Styled(value, "report_centered") for value in values + year_changes(values)
+            )
+        sheet.append(cells)
+
+    workbook.save(output)
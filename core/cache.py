@@ -0,0 +1,237 @@
+"""
+Size-bounded on-disk cache for rendered report files (broadsheets, exports, templates).
+"""
+import fcntl
+import hashlib
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+from .models import ItemRegister
+
+
+def inventory_version(inventory):
+    """
+    Return (version, last_modified) describing an InventoryItem queryset and the Register.
+
+    Only two cheap aggregates are run. The version changes whenever the queryset's rows or
+    the Register change; row counts catch deletions that the latest `updated_at` alone
+    would miss.
+    """
+    rows = inventory.aggregate(last_modified=Max("updated_at"), count=Count("id"))
+    register = ItemRegister.objects.aggregate(
+        last_modified=Max("updated_at"), count=Count("id")
+    )
+    version = hashlib.sha1(
+        f"{rows['count']}:{rows['last_modified']}:"
+        f"{register['count']}:{register['last_modified']}".encode()
+    ).hexdigest()
+    timestamps = [
+        timestamp
+        for timestamp in (rows["last_modified"], register["last_modified"])
+        if timestamp
+    ]
+    return version, max(timestamps) if timestamps else None
+
+
+def register_version():
+    """
+    Return a version string that changes whenever the Register changes (one aggregate).
+    """
+    register = ItemRegister.objects.aggregate(
+        last_modified=Max("updated_at"), count=Count("id")
+    )
+    return f"{register['count']}:{register['last_modified']}"
+
+
+class ReportCache:
+    """
+    Stores rendered report files under `REPORT_CACHE_DIR`, evicting the least recently used
+    files once the directory grows past `REPORT_CACHE_MAX_BYTES`.
+
+    Entries are named `<namespace>-<scope>-<digest>` where the digest covers the full key
+    (parameters, organization, data version). Invalidating a scope (e.g. a broadsheet year)
+    removes every entry for it at once. Hit/miss counters are kept in a small locked file per
+    namespace next to the entries, so every worker process (and the `report_cache` command)
+    sees the same counts.
+
+    Rendering is single-flight: `open_or_render` takes a cross-process lock file per entry, so
+    when several workers ask for the same report only one renders it and the others wait
+    and share the stored result.
+    """
+
+    @property
+    def directory(self):
+        return Path(settings.REPORT_CACHE_DIR)
+
+    @property
+    def max_bytes(self):
+        return settings.REPORT_CACHE_MAX_BYTES
+
+    @property
+    def lock_timeout(self):
+        return settings.REPORT_CACHE_LOCK_TIMEOUT
+
+    def digest(self, key):
+        return hashlib.sha1(repr(key).encode()).hexdigest()
+
+    def path_for(self, namespace, scope, key):
+        return self.directory / f"{namespace}-{scope}-{self.digest(key)}"
+
+    def open(self, namespace, scope, key, counter="hits"):
+        """
+        Return an open binary file for a cached entry, or None on a miss.
+        """
+        path = self.path_for(namespace, scope, key)
+        try:
+            cached_file = open(path, "rb")
+        except FileNotFoundError:
+            if counter == "hits":
+                self.count(namespace, "misses")
+            return None
+        os.utime(path)  # Mark as recently used for eviction
+        self.count(namespace, counter)
+        return cached_file
+
+    def open_or_render(self, namespace, scope, key, render):
+        """
+        Return (file, status) for an entry, rendering it with `render(file_obj)` on a miss.
+
+        Status is "HIT", "MISS" (this caller rendered it) or "COALESCED" (another worker was
+        already rendering it and this caller waited for its result).
+        """
+        cached_file = self.open(namespace, scope, key)
+        if cached_file is not None:
+            return cached_file, "HIT"
+
+        with self.render_lock(namespace, key):
+            cached_file = self.open(namespace, scope, key, counter="coalesced")
+            if cached_file is not None:
+                return cached_file, "COALESCED"
+            return self.store(namespace, scope, key, render), "MISS"
+
+    @contextmanager
+    def render_lock(self, namespace, key):
+        """
+        Cross-process lock around rendering one entry, held as an exclusively created lock file.
+
+        Waiters poll until the file disappears. Locks older than `lock_timeout` are treated as
+        left behind by a killed worker and broken; after waiting `lock_timeout` the caller
+        renders on its own rather than failing the request.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f".lock-{namespace}-{self.digest(key)}"
+        deadline = time.monotonic() + self.lock_timeout
+        fd = None
+        while fd is None:
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                try:
+                    age = time.time() - path.stat().st_mtime
+                except FileNotFoundError:
+                    continue
+                if age > self.lock_timeout:
+                    path.unlink(missing_ok=True)
+                elif time.monotonic() > deadline:
+                    break
+                else:
+                    time.sleep(0.1)
+        try:
+            yield
+        finally:
+            if fd is not None:
+                os.close(fd)
+                path.unlink(missing_ok=True)
+
+    def store(self, namespace, scope, key, render):
+        """
+        Render an entry with `render(file_obj)`, store it atomically and return it opened for reading.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.path_for(namespace, scope, key)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as output:
+                render(output)
+            os.replace(temp_path, path)
+        except Exception:
+            os.unlink(temp_path)
+            raise
+
+        cached_file = open(path, "rb")
+        self.evict()
+        return cached_file
+
+    def invalidate(self, namespace, scope=None):
+        """
+        Remove every entry of a namespace, or only those of one scope.
+        """
+        pattern = f"{namespace}-{scope}-*" if scope is not None else f"{namespace}-*"
+        for path in self.directory.glob(pattern):
+            path.unlink(missing_ok=True)
+
+    def evict(self):
+        """
+        Delete least recently used entries until the cache fits in `max_bytes`.
+        """
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.startswith(".") or not entry.is_file():
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            Path(path).unlink(missing_ok=True)
+            total -= size
+
+    def counters_path(self, namespace):
+        return self.directory / f".counters-{namespace}"
+
+    def count(self, namespace, name):
+        """
+        Increment a counter of a namespace, under an exclusive lock on its counter file.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.counters_path(namespace), "a+") as counters:
+            fcntl.flock(counters, fcntl.LOCK_EX)
+            counters.seek(0)
+            values = json.loads(counters.read() or "{}")
+            values[name] = values.get(name, 0) + 1
+            counters.truncate(0)
+            counters.write(json.dumps(values))
+
+    def stats(self, namespace):
+        """
+        Return the hit/miss counters and the current on-disk size of a namespace.
+        """
+        try:
+            with open(self.counters_path(namespace)) as counters:
+                fcntl.flock(counters, fcntl.LOCK_SH)
+                values = json.loads(counters.read() or "{}")
+        except FileNotFoundError:
+            values = {}
+        files = list(self.directory.glob(f"{namespace}-*")) if self.directory.exists() else []
+        return {
+            "hits": values.get("hits", 0),
+            "misses": values.get("misses", 0),
+            "coalesced": values.get("coalesced", 0),
+            "entries": len(files),
+            "bytes": sum(path.stat().st_size for path in files if path.exists()),
+        }
+
+
+report_cache = ReportCache()
@@ -0,0 +1,127 @@
+"""
+Shared helpers for serving Excel workbooks.
+"""
+import tempfile
+import zipfile
+from xml.sax.saxutils import escape
+
+from django.http import FileResponse, StreamingHttpResponse
+
+XLSX_CONTENT_TYPE = (
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+)
+
+
+def streaming_xlsx_response(render, filename):
+    """
+    Render a workbook into a temporary file and stream it back in chunks.
+
+    `render` is called with a binary file object to write the workbook into. The temporary
+    file is removed once the response has been sent, so the workbook never has to be held
+    in memory as a whole.
+    """
+    output = tempfile.TemporaryFile()
+    try:
+        render(output)
+        output.seek(0)
+    except Exception:
+        output.close()
+        raise
+    return xlsx_file_response(output, filename)
+
+
+def xlsx_file_response(file_obj, filename):
+    """
+    Stream an already rendered workbook file back in chunks; the file is closed afterwards.
+    """
+    response = FileResponse(file_obj, content_type=XLSX_CONTENT_TYPE)
+    response["Content-Disposition"] = f"attachment; filename={filename}"
+    return response
+
+
+def xlsx_chunks_response(chunks, filename):
+    """
+    Stream a workbook produced chunk by chunk (e.g. by `patch_placeholder`).
+    """
+    response = StreamingHttpResponse(chunks, content_type=XLSX_CONTENT_TYPE)
+    response["Content-Disposition"] = f"attachment; filename={filename}"
+    return response
+
+
+def _replace_chunks(source, placeholder, value, chunk_size=1024 * 1024):
+    """
+    Read `source` chunk by chunk and yield its content with `placeholder` replaced by `value`
+    (both bytes). The last len(placeholder) - 1 bytes of each chunk are carried over, so a
+    placeholder split across two chunks is still found.
+    """
+    carry = b""
+    while True:
+        chunk = source.read(chunk_size)
+        buffer = carry + chunk
+        if not chunk:
+            yield buffer.replace(placeholder, value)
+            return
+        cut = len(buffer) - (len(placeholder) - 1)
+        position = 0
+        while True:
+            found = buffer.find(placeholder, position)
+            if found == -1 or found >= cut:
+                break
+            yield buffer[position:found]
+            yield value
+            position = found + len(placeholder)
+        cut = max(cut, position)
+        yield buffer[position:cut]
+        carry = buffer[cut:]
+
+
+class _ChunkSink:
+    """
+    Write-only file object collecting what a ZipFile writes, to be drained between writes.
+    It cannot seek, so zipfile writes each part's sizes after its data.
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def patch_placeholder(file_obj, placeholder, value):
+    """
+    Yield an xlsx file chunk by chunk with a text placeholder replaced by `value`.
+
+    Used to put per-user text (e.g. "Exported by") into a workbook that is rendered once and
+    shared between users. Only the worksheet and shared string parts are rewritten; every
+    other part is copied as is. The output is produced while it is sent, so the first bytes
+    go out at once and memory stays flat whatever the workbook size. `file_obj` is closed.
+    """
+    placeholder = placeholder.encode("utf-8")
+    value = escape(value).encode("utf-8")
+    sink = _ChunkSink()
+    with file_obj, zipfile.ZipFile(file_obj) as source:
+        with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED) as target:
+            for info in source.infolist():
+                with source.open(info) as part, target.open(info, "w") as copy:
+                    if info.filename.startswith("xl/worksheets/") or (
+                        info.filename == "xl/sharedStrings.xml"
+                    ):
+                        chunks = _replace_chunks(part, placeholder, value)
+                    else:
+                        chunks = iter(lambda: part.read(1024 * 1024), b"")
+                    for chunk in chunks:
+                        copy.write(chunk)
+                        data = sink.drain()
+                        if data:
+                            yield data
+        yield sink.drain()
@@ -0,0 +1,556 @@
+"""
+Bulk import pipeline for filled-in inventory and Register templates (xlsx or CSV).
+"""
+import codecs
+import csv
+import hashlib
+import re
+import tempfile
+import zipfile
+from contextlib import contextmanager
+from datetime import date
+
+from django.conf import settings
+from django.db import transaction
+from django.template.defaultfilters import filesizeformat
+from django.utils import timezone
+from openpyxl import load_workbook
+
+from .cache import report_cache
+from .models import InventoryItem, ItemRegister, Office, ProcessedImport
+from .parallel import run_in_pool
+from .summary import inventory_summary_key, refresh_broadsheet_summary
+
+# Rows between two progress reports
+PROGRESS_EVERY = 500
+
+# Register field limits, checked per row so one bad row cannot fail the whole bulk write
+NAME_LENGTH = ItemRegister._meta.get_field("name").max_length
+DESCRIPTION_LENGTH = ItemRegister._meta.get_field("description").max_length
+
+INVENTORY_TEMPLATE_HEADERS = [
+    "S/N",
+    "Item ID",
+    "Items",
+    "Qty",
+    "Description (Optional)",
+    "Remarks",
+]
+
+
+class InventoryImportError(Exception):
+    """
+    Raised when an uploaded template cannot be imported; `detail` is the error response body.
+    """
+
+    def __init__(self, detail):
+        super().__init__(detail.get("error"))
+        self.detail = detail
+
+
+def upload_digest(file_obj):
+    """
+    SHA-256 of an uploaded file, read in chunks; the file is rewound afterwards.
+    """
+    digest = hashlib.sha256()
+    for chunk in file_obj.chunks():
+        digest.update(chunk)
+    file_obj.seek(0)
+    return digest.hexdigest()
+
+
+def find_processed_import(kind, content_hash, user, office=None, year=None):
+    """
+    Return the ProcessedImport of an identical file already imported in the same scope
+    (kind, user, office and year), or None.
+    """
+    return ProcessedImport.objects.filter(
+        kind=kind,
+        content_hash=content_hash,
+        user=user,
+        office=office,
+        year=year or date.today().year,
+    ).first()
+
+
+def record_processed_import(kind, content_hash, user, result, office=None, year=None):
+    """
+    Remember a successfully imported file and the result returned for it.
+    """
+    ProcessedImport.objects.update_or_create(
+        kind=kind,
+        content_hash=content_hash,
+        user=user,
+        office=office,
+        year=year or date.today().year,
+        defaults={"result": result},
+    )
+
+
+def is_csv_upload(file_obj):
+    """
+    Tell CSV uploads from xlsx templates by file extension or content type.
+    """
+    name = (getattr(file_obj, "name", None) or "").lower()
+    content_type = (getattr(file_obj, "content_type", None) or "").split(";")[0]
+    return name.endswith(".csv") or content_type in ("text/csv", "application/csv")
+
+
+def check_upload_size(file_obj):
+    """
+    Refuse uploads larger than `IMPORT_MAX_UPLOAD_BYTES` before anything parses them.
+    """
+    limit = settings.IMPORT_MAX_UPLOAD_BYTES
+    if file_obj.size > limit:
+        raise InventoryImportError(
+            {"error": f"The file is too large. Uploads are limited to {filesizeformat(limit)}."}
+        )
+
+
+@contextmanager
+def spooled_upload(file_obj):
+    """
+    Yield a filesystem path holding the upload, after checking its size.
+
+    Uploads Django already spooled to a temporary file are used in place. Small ones held
+    in memory are copied to a temporary file chunk by chunk, so workbooks are always parsed
+    from disk.
+    """
+    check_upload_size(file_obj)
+    if hasattr(file_obj, "temporary_file_path"):
+        yield file_obj.temporary_file_path()
+        return
+    with tempfile.NamedTemporaryFile(suffix=".xlsx") as spooled:
+        for chunk in file_obj.chunks():
+            spooled.write(chunk)
+        spooled.flush()
+        yield spooled.name
+
+
+def open_workbook(path):
+    """
+    Open a spooled xlsx read-only.
+
+    Read-only mode streams the sheets, but it still loads the shared strings table whole.
+    Archives that unpack past `IMPORT_MAX_UNPACKED_BYTES` are therefore refused unopened.
+    """
+    try:
+        with zipfile.ZipFile(path) as archive:
+            unpacked = sum(info.file_size for info in archive.infolist())
+    except zipfile.BadZipFile as e:
+        raise InventoryImportError({"error": "Invalid Excel file format."}) from e
+    if unpacked > settings.IMPORT_MAX_UNPACKED_BYTES:
+        raise InventoryImportError({"error": "The workbook is too large to import."})
+
+    try:
+        return load_workbook(path, read_only=True, data_only=True)
+    except Exception as e:
+        raise InventoryImportError({"error": "Invalid Excel file format."}) from e
+
+
+def too_many_rows_error():
+    limit = settings.IMPORT_MAX_ROWS
+    return InventoryImportError(
+        {"error": f"Too many rows. At most {limit} rows can be imported from one sheet."}
+    )
+
+
+def limit_rows(rows, header_row):
+    """
+    Pass (row number, values) rows through, failing once more than `IMPORT_MAX_ROWS` rows
+    follow the header row.
+    """
+    for row_number, values in rows:
+        if row_number - header_row > settings.IMPORT_MAX_ROWS:
+            raise too_many_rows_error()
+        yield row_number, values
+
+
+def sheet_rows(sheet, header_row):
+    """
+    (row number, values) for the header row of a read-only sheet and every row after it.
+    The size the sheet declares is checked against `IMPORT_MAX_ROWS` before any row is read.
+    """
+    if (sheet.max_row or 0) - header_row > settings.IMPORT_MAX_ROWS:
+        raise too_many_rows_error()
+    rows = sheet.iter_rows(min_row=header_row, values_only=True)
+    return limit_rows(enumerate(rows, start=header_row), header_row)
+
+
+def iter_upload_rows(file_obj, header_row, int_columns=()):
+    """
+    Yield (row number, values) for the header row and every row after it.
+
+    xlsx templates are spooled to disk and opened read-only with the header at
+    `header_row`. CSV files are decoded and parsed line by line with their header on the
+    first line. Empty cells become None and whole numbers in `int_columns` become ints, so
+    both front ends produce the same row records. Memory stays bounded: the upload size, the
+    unpacked workbook size and the row count are limited (see the IMPORT_MAX_* settings).
+    Raises InventoryImportError for unreadable or oversized files.
+    """
+    if is_csv_upload(file_obj):
+        check_upload_size(file_obj)
+        try:
+            reader = csv.reader(codecs.iterdecode(file_obj, "utf-8-sig"))
+            for row_number, row in limit_rows(enumerate(reader, start=1), header_row=1):
+                values = [value.strip() or None for value in row]
+                for column in int_columns:
+                    if column < len(values) and (values[column] or "").isdigit():
+                        values[column] = int(values[column])
+                yield row_number, tuple(values)
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise InventoryImportError(
+                {"error": f"Invalid CSV file. It must be UTF-8 encoded. Details: {e}"}
+            ) from e
+        return
+
+    with spooled_upload(file_obj) as path:
+        workbook = open_workbook(path)
+        try:
+            yield from sheet_rows(workbook.active, header_row)
+        finally:
+            workbook.close()
+
+
+def read_inventory_rows(file_obj):
+    """
+    Yield (row number, item ID, item name, quantity, description, remarks) for every row of
+    an inventory template (xlsx or CSV) that has an item ID.
+
+    Rows are streamed from the file instead of loading the whole sheet into memory. The
+    header row is validated first.
+    """
+    return inventory_records(iter_upload_rows(file_obj, header_row=3, int_columns=(3,)))
+
+
+def inventory_records(rows):
+    """
+    Turn (row number, values) rows, starting with the header row, into inventory records.
+    """
+    actual_headers = [str(value).strip() for value in next(rows, (None, ()))[1]]  # Normalize headers
+    if actual_headers != INVENTORY_TEMPLATE_HEADERS:
+        raise InventoryImportError(
+            {
+                "error": "Invalid template format. Please use the correct template.",
+                "expected_headers": INVENTORY_TEMPLATE_HEADERS,
+                "actual_headers": actual_headers,  # Include actual headers for debugging
+            }
+        )
+
+    for row_number, row in rows:
+        _, item_id, item_name, quantity, description, remarks = (tuple(row) + (None,) * 6)[:6]
+        # Skip rows where item_id is empty (such as empty or signature rows)
+        if item_id:
+            yield row_number, item_id, item_name, quantity, description, remarks
+
+
+def validate_inventory_row(row_number, item, item_id, item_name, quantity):
+    """
+    Yield every problem with one template row; `item` is the register entry for its item ID.
+    """
+    # Validate item ID
+    if not item:
+        yield f"Invalid item ID '{item_id}' in row {row_number}."
+
+    # Ensure item ID matches item name
+    elif item.name != item_name:
+        yield f"Item name '{item_name}' does not match item ID '{item_id}' in row {row_number}."
+
+    # Validate quantity
+    if not isinstance(quantity, int) or quantity < 1:
+        yield f"Invalid quantity '{quantity}' in row {row_number}. Must be a positive integer."
+
+
+def validate_inventory_rows(rows):
+    """
+    Resolve the item IDs of all rows with one query and validate every row against them.
+    Returns (register items by item ID, errors).
+    """
+    items = ItemRegister.objects.in_bulk(
+        {row[1] for row in rows}, field_name="item_id"
+    )
+    errors = [
+        {"row": row_number, "item_id": item_id, "error": error}
+        for row_number, item_id, item_name, quantity, _, _ in rows
+        for error in validate_inventory_row(
+            row_number, items.get(item_id), item_id, item_name, quantity
+        )
+    ]
+    return items, errors
+
+
+def import_error(errors):
+    return InventoryImportError(
+        {
+            "error": f"Found {len(errors)} error(s) in the template. Nothing was imported.",
+            "errors": errors,
+        }
+    )
+
+
+def import_inventory(file_obj, user, office, year=None, dry_run=False, progress=None):
+    """
+    Import a filled-in template into `office` for `user`, for `year` (default: this year).
+
+    Every item ID and every existing inventory row are resolved with one set-based query
+    each. All rows are validated in one pass against that register index. Then new rows are
+    bulk-created and changed rows bulk-updated in one transaction, so the query count does
+    not grow with the number of rows. A later row for the same item overrides an earlier one.
+
+    With `dry_run` nothing is written. `progress(stage, processed_rows)` is called as the
+    import advances (background jobs report it to polling clients). Returns (created rows,
+    updated rows); raises InventoryImportError listing every invalid row.
+    """
+    progress = progress or (lambda stage, processed_rows: None)
+    rows = []
+    for row in read_inventory_rows(file_obj):
+        rows.append(row)
+        if len(rows) % PROGRESS_EVERY == 0:
+            progress("parsing", len(rows))
+    progress("validating", len(rows))
+
+    items, errors = validate_inventory_rows(rows)
+    if errors:
+        raise import_error(errors)
+
+    return write_inventory([(office, rows)], items, user, year, dry_run, progress)
+
+
+def write_inventory(office_rows, items, user, year=None, dry_run=False, progress=None):
+    """
+    Apply validated rows to the inventory of `user` for `year` in one batched write.
+
+    `office_rows` is a list of (office, rows) and `items` the register items by item ID. The
+    existing inventory of all offices is fetched with one query, then new rows are
+    bulk-created and changed ones bulk-updated in a single transaction. Returns (created
+    rows, updated rows); with `dry_run` nothing is written.
+    """
+    progress = progress or (lambda stage, processed_rows: None)
+    year = year or date.today().year
+    existing = {
+        (inventory_item.office_id, inventory_item.item_id_id): inventory_item
+        for inventory_item in InventoryItem.objects.filter(
+            user=user,
+            office__in=[office for office, _ in office_rows],
+            year=year,
+            item_id__in=[item.pk for item in items.values()],
+        )
+    }
+
+    now = timezone.now()
+    created, updated = {}, {}
+    for office, rows in office_rows:
+        for _, item_id, _, quantity, description, remarks in rows:
+            item = items[item_id]
+            key = (office.pk, item.pk)
+            inventory_item = existing.get(key)
+            if inventory_item:
+                inventory_item.item_id = item
+                inventory_item.quantity = quantity
+                inventory_item.remarks = remarks or ""
+                # bulk_update does not apply auto_now
+                inventory_item.updated_at = now
+                updated[key] = inventory_item
+            elif key in created:
+                created[key].quantity = quantity
+                created[key].remarks = remarks or ""
+            else:
+                created[key] = InventoryItem(
+                    user=user,
+                    office=office,
+                    item_id=item,
+                    quantity=quantity,
+                    remarks=remarks or "",
+                    description=description or "",  # Add the description field
+                    year=year,
+                )
+
+    if dry_run:
+        return list(created.values()), list(updated.values())
+
+    progress("writing", sum(len(rows) for _, rows in office_rows))
+    with transaction.atomic():
+        InventoryItem.objects.bulk_create(created.values())
+        InventoryItem.objects.bulk_update(
+            updated.values(), ["quantity", "remarks", "updated_at"]
+        )
+        # Bulk writes skip model signals, so refresh the broadsheet summary explicitly
+        refresh_broadsheet_summary(
+            inventory_summary_key(inventory_item)
+            for inventory_item in [*created.values(), *updated.values()]
+        )
+
+    return list(created.values()), list(updated.values())
+
+
+OFFICE_HEADER = re.compile(r"^\s*Office:\s*(?P<name>.*?)\s*\|\s*Description:")
+
+
+def parse_office_sheet(path, sheet_name):
+    """
+    Read and validate one office sheet of a multi-office workbook (runs in report workers).
+
+    The office is taken from the header line `TemplateView` writes in row 2. Returns
+    (sheet name, office name, rows, errors).
+    """
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = workbook[sheet_name]
+        office_line = next(sheet.iter_rows(min_row=2, max_row=2, values_only=True), (None,))[0]
+        match = OFFICE_HEADER.match(str(office_line or ""))
+        if not match:
+            return sheet_name, None, [], [
+                {"row": 2, "error": "Missing 'Office: ... | Description: ...' header in row 2."}
+            ]
+        try:
+            records = list(inventory_records(sheet_rows(sheet, header_row=3)))
+        except InventoryImportError as exc:
+            return sheet_name, match["name"], [], [{"row": 3, "error": exc.detail["error"]}]
+    finally:
+        workbook.close()
+
+    _, errors = validate_inventory_rows(records)
+    return sheet_name, match["name"], records, errors
+
+
+def import_office_workbook(file_obj, user, year=None, dry_run=False):
+    """
+    Import a workbook holding one inventory template sheet per office.
+
+    The upload is spooled to disk and its sheets are parsed and validated in parallel report
+    worker processes (`REPORT_WORKERS`). If every sheet is valid, all offices are written in
+    one batched transaction. Returns (created rows, updated rows, rows per office name);
+    raises InventoryImportError listing every invalid row of every sheet.
+    """
+    with spooled_upload(file_obj) as path:
+        workbook = open_workbook(path)
+        sheet_names = workbook.sheetnames
+        workbook.close()
+
+        sheets = run_in_pool(parse_office_sheet, [(path, name) for name in sheet_names])
+
+    offices = Office.objects.in_bulk(
+        {office_name for _, office_name, _, _ in sheets if office_name}, field_name="name"
+    )
+    errors = []
+    office_rows = {}
+    for sheet_name, office_name, rows, sheet_errors in sheets:
+        if office_name and office_name not in offices:
+            sheet_errors = [{"row": 2, "error": f"Unknown office '{office_name}'."}]
+        errors.extend({"sheet": sheet_name, **error} for error in sheet_errors)
+        if not sheet_errors:
+            office_rows.setdefault(offices[office_name], []).extend(rows)
+    if errors:
+        raise import_error(errors)
+
+    items = ItemRegister.objects.in_bulk(
+        {row[1] for rows in office_rows.values() for row in rows}, field_name="item_id"
+    )
+    created, updated = write_inventory(
+        list(office_rows.items()), items, user, year, dry_run
+    )
+    rows_per_office = {office.name: len(rows) for office, rows in office_rows.items()}
+    return created, updated, rows_per_office
+
+
+def import_register(file_obj, progress=None):
+    """
+    Create or update Register items from an uploaded Register template (xlsx or CSV), set-based.
+
+    The rows are read in one streaming pass. The names are diffed against the Register with a
+    single lookup, item IDs for new names are allocated in batch, and everything is written
+    with one bulk upsert and one bulk update in a transaction. A later row for the same
+    name overrides an earlier one; rows without a name are reported and skipped.
+
+    Returns (created names, updated names, errors); errors are per-row messages. Raises
+    InventoryImportError when the file is not a valid Register template.
+    """
+    progress = progress or (lambda stage, processed_rows: None)
+    rows = iter_upload_rows(file_obj, header_row=3)
+
+    # Validate headers
+    expected_headers = ["S/N", "Name", "Description"]
+    actual_headers = list(next(rows, (None, ()))[1])
+    if actual_headers[: len(expected_headers)] != expected_headers:
+        raise InventoryImportError(
+            {"error": "Invalid template format. Please use the correct template."}
+        )
+
+    descriptions = {}
+    errors = []
+    for processed_rows, (i, row) in enumerate(rows, start=1):
+        _, name, description = (tuple(row) + (None,) * 3)[:3]
+        if processed_rows % PROGRESS_EVERY == 0:
+            progress("parsing", processed_rows)
+
+        # Validate row data
+        name = str(name).strip() if name is not None else ""
+        description = str(description).strip() if description else None
+        if not name:
+            errors.append(f"Row {i}: Name is required.")
+            continue
+        if len(name) > NAME_LENGTH or len(description or "") > DESCRIPTION_LENGTH:
+            errors.append(
+                f"Row {i}: Name or description of item '{name}' is too long "
+                f"(at most {NAME_LENGTH} and {DESCRIPTION_LENGTH} characters)."
+            )
+            continue
+        descriptions[name] = description
+
+    progress("writing", len(descriptions))
+    existing = ItemRegister.objects.in_bulk(descriptions, field_name="name")
+    now = timezone.now()
+
+    # Update the description of existing items if provided
+    updated = []
+    for name, item in existing.items():
+        description = descriptions[name]
+        if description and description != item.description:
+            item.description = description
+            item.updated_at = now  # bulk_update does not apply auto_now
+            updated.append(item)
+
+    new_names = [name for name in descriptions if name not in existing]
+    item_ids = allocate_item_ids(len(new_names))
+    created = [
+        ItemRegister(name=name, item_id=item_id, description=descriptions[name])
+        for name, item_id in zip(new_names, item_ids)
+    ]
+
+    with transaction.atomic():
+        # An item created concurrently under the same name is updated instead
+        ItemRegister.objects.bulk_create(
+            created,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=["name"],
+            update_fields=["description", "updated_at"],
+        )
+        ItemRegister.objects.bulk_update(
+            updated, ["description", "updated_at"], batch_size=1000
+        )
+
+    # Bulk writes skip the Register signals; names and descriptions appear in every broadsheet
+    report_cache.invalidate("broadsheet")
+    report_cache.invalidate("template")
+
+    return new_names, list(existing), errors
+
+
+def allocate_item_ids(count):
+    """
+    Generate `count` unique Register item IDs in batch, with one query per round to
+    rule out IDs that are already taken.
+    """
+    item_ids = set()
+    while len(item_ids) < count:
+        candidates = {
+            ItemRegister.generate_item_id() for _ in range(count - len(item_ids))
+        } - item_ids
+        taken = set(
+            ItemRegister.objects.filter(item_id__in=candidates).values_list(
+                "item_id", flat=True
+            )
+        )
+        item_ids |= candidates - taken
+    return list(item_ids)
@@ -0,0 +1,120 @@
+"""
+Background processing of spooled import uploads (see the `process_import_jobs` command).
+
+Uploads are spooled to the default storage by the web process and read back by the worker,
+so both must reach the same storage: a shared MEDIA_ROOT or a shared backend such as S3.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from .imports import (
+    InventoryImportError,
+    import_inventory,
+    import_register,
+    record_processed_import,
+)
+from .models import ImportJob
+
+logger = logging.getLogger(__name__)
+
+
+def reclaim_stale_import_jobs():
+    """
+    Requeue jobs left running for longer than IMPORT_JOB_TIMEOUT by a worker that died, and
+    fail those already claimed IMPORT_JOB_MAX_ATTEMPTS times. Returns the number of jobs
+    requeued and failed.
+    """
+    stale = ImportJob.objects.filter(
+        status=ImportJob.RUNNING,
+        started_at__lt=timezone.now() - timedelta(seconds=settings.IMPORT_JOB_TIMEOUT),
+    )
+    failed = stale.filter(attempts__gte=settings.IMPORT_JOB_MAX_ATTEMPTS).update(
+        status=ImportJob.FAILED,
+        stage="",
+        errors=["The import was interrupted too many times and has been abandoned."],
+        finished_at=timezone.now(),
+    )
+    requeued = stale.update(status=ImportJob.PENDING, stage="", processed_rows=0)
+    if failed or requeued:
+        logger.warning("Reclaimed stale import jobs: %s requeued, %s failed", requeued, failed)
+    return requeued, failed
+
+
+def claim_next_import_job():
+    """
+    Mark the oldest pending job as running and return it, or None when the queue is empty.
+    Stale running jobs are reclaimed first.
+
+    The claim is a conditional UPDATE, so several workers can poll the same table without
+    picking up the same job.
+    """
+    reclaim_stale_import_jobs()
+    for job in ImportJob.objects.filter(status=ImportJob.PENDING).order_by("id")[:10]:
+        claimed = ImportJob.objects.filter(pk=job.pk, status=ImportJob.PENDING).update(
+            status=ImportJob.RUNNING, started_at=timezone.now(), attempts=F("attempts") + 1
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+    return None
+
+
+def run_import_job(job):
+    """
+    Run a claimed job to completion, recording its progress, result and errors.
+    The spooled upload is removed once the job has finished.
+    """
+
+    def progress(stage, processed_rows):
+        job.stage = stage
+        job.processed_rows = processed_rows
+        job.save(update_fields=["stage", "processed_rows"])
+
+    try:
+        with job.file.open("rb") as file_obj:
+            if job.kind == ImportJob.INVENTORY:
+                dry_run = job.options.get("dry_run", False)
+                created, updated = import_inventory(
+                    file_obj, job.user, job.office, dry_run=dry_run, progress=progress
+                )
+                job.result = {
+                    "dry_run": dry_run,
+                    "new_items": len(created),
+                    "updated_items": [item.item_id.name for item in updated],
+                }
+                job.status = ImportJob.SUCCEEDED
+            else:
+                created, updated, errors = import_register(file_obj, progress=progress)
+                job.result = {"created_items": created, "updated_items": updated}
+                job.errors = errors
+                job.status = ImportJob.FAILED if errors else ImportJob.SUCCEEDED
+    except FileNotFoundError:
+        logger.exception("Import job %s lost its upload", job.pk)
+        job.status = ImportJob.FAILED
+        job.errors = [
+            "The uploaded file could not be found. The web and worker processes must share "
+            "the media storage."
+        ]
+    except InventoryImportError as exc:
+        job.status = ImportJob.FAILED
+        job.errors = exc.detail.get("errors") or [exc.detail["error"]]
+    except Exception as exc:
+        logger.exception("Import job %s failed", job.pk)
+        job.status = ImportJob.FAILED
+        job.errors = [f"Unexpected error: {exc}"]
+
+    job.stage = ""
+    job.finished_at = timezone.now()
+    job.save()
+
+    # Identical re-uploads in the same scope get this result back (see the import views)
+    content_hash = job.options.get("content_hash")
+    if content_hash and job.status == ImportJob.SUCCEEDED and not job.result.get("dry_run"):
+        record_processed_import(job.kind, content_hash, job.user, job.result, job.office)
+
+    job.file.delete(save=False)
+    return job
@@ -0,0 +1,98 @@
+import re
+import tempfile
+import time
+import zipfile
+from functools import partial
+
+from django.core.management.base import BaseCommand
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font
+
+from core.reports import ReportWorkbook, Styled
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the report rendering engine on synthetic data: named styles on the "
+        "write-only and in-memory back ends against per-cell Font/Alignment objects"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=20000, help="Data rows per sheet")
+        parser.add_argument('--columns', type=int, default=20, help="Styled columns per row")
+        parser.add_argument('--repeat', type=int, default=3, help="Runs per back end (best is reported)")
+
+    def handle(self, *args, **kwargs):
+        rows, columns = kwargs['rows'], kwargs['columns']
+        backends = [
+            ("per-cell styles (write-only)", self.render_per_cell_styles),
+            ("named styles (write-only)", partial(self.render_engine, write_only=True)),
+            ("named styles (in-memory)", partial(self.render_engine, write_only=False)),
+        ]
+        self.stdout.write(f"{rows} rows x {columns} columns, best of {kwargs['repeat']} runs")
+        for name, render in backends:
+            timings = []
+            for _ in range(kwargs['repeat']):
+                with tempfile.TemporaryFile() as output:
+                    started = time.perf_counter()
+                    render(output, rows, columns)
+                    timings.append(time.perf_counter() - started)
+                    size = output.tell()
+                    cell_formats = self.count_cell_formats(output)
+            best = min(timings)
+            self.stdout.write(
+                f"{name:30} {best:8.3f}s {rows / best:10.0f} rows/s "
+                f"{size:>10} bytes {cell_formats:>4} cell formats"
+            )
+
+    def data_rows(self, rows, columns):
+        for row in range(1, rows + 1):
+            yield [row, f"OLASS-{row:08X}", f"Item {row}"] + [
+                row * column % 97 for column in range(columns)
+            ]
+
+    def render_per_cell_styles(self, output, rows, columns):
+        # How the reports were written before the engine: style objects built per cell
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet("Benchmark")
+
+        def styled(value, font=None, alignment=None):
+            cell = WriteOnlyCell(sheet, value=value)
+            if font:
+                cell.font = font
+            if alignment:
+                cell.alignment = alignment
+            return cell
+
+        sheet.append(
+            [
+                styled(f"Column {column}", Font(bold=True), Alignment(horizontal="center"))
+                for column in range(columns + 3)
+            ]
+        )
+        for values in self.data_rows(rows, columns):
+            sheet.append(
+                values[:3]
+                + [styled(value, alignment=Alignment(horizontal="center")) for value in values[3:]]
+            )
+        workbook.save(output)
+
+    def render_engine(self, output, rows, columns, write_only):
+        workbook = ReportWorkbook(write_only=write_only)
+        sheet = workbook.sheet("Benchmark")
+        sheet.append(
+            [Styled(f"Column {column}", "report_header") for column in range(columns + 3)]
+        )
+        for values in self.data_rows(rows, columns):
+            sheet.append(
+                values[:3] + [Styled(value, "report_centered") for value in values[3:]]
+            )
+        workbook.save(output)
+
+    def count_cell_formats(self, output):
+        output.seek(0)
+        with zipfile.ZipFile(output) as archive:
+            styles = archive.read("xl/styles.xml").decode("utf-8")
+        match = re.search(r'<cellXfs count="(\d+)"', styles)
+        return int(match.group(1)) if match else 0
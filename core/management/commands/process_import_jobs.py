@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+from core.jobs import claim_next_import_job, run_import_job
+
+
+class Command(BaseCommand):
+    help = "Run the background import worker: process pending import jobs as they are queued"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Process the pending jobs, then exit")
+        parser.add_argument('--poll-interval', type=float, default=2.0, help="Seconds between queue polls")
+
+    def handle(self, *args, **kwargs):
+        while True:
+            # Drop connections the database has closed or that outlived CONN_MAX_AGE, unless
+            # the worker was started inside a transaction (e.g. from a test)
+            if not connection.in_atomic_block:
+                close_old_connections()
+            job = claim_next_import_job()
+            if job is None:
+                if kwargs['once']:
+                    return
+                time.sleep(kwargs['poll_interval'])
+                continue
+
+            job = run_import_job(job)
+            style = self.style.SUCCESS if job.status == job.SUCCEEDED else self.style.ERROR
+            self.stdout.write(style(f"{job}: {job.result or job.errors}"))
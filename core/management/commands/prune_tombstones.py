@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import InventoryTombstone
+
+
+class Command(BaseCommand):
+    help = "Delete inventory deletion tombstones older than the delta export retention period"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.DELTA_TOMBSTONE_RETENTION_DAYS,
+            help="Keep tombstones of the last this many days",
+        )
+
+    def handle(self, *args, **kwargs):
+        cutoff = timezone.now() - timedelta(days=kwargs['days'])
+        count, _ = InventoryTombstone.objects.filter(deleted_at__lt=cutoff).delete()
+        self.stdout.write(
+            self.style.SUCCESS(f"Deleted {count} tombstones older than {kwargs['days']} days.")
+        )
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from core.summary import rebuild_broadsheet_summary
+
+
+class Command(BaseCommand):
+    help = "Rebuild the precomputed broadsheet summary table from inventory items"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, help="Only rebuild the summary for this year")
+
+    def handle(self, *args, **kwargs):
+        year = kwargs.get('year')
+        count = rebuild_broadsheet_summary(year=year)
+
+        scope = f"year {year}" if year else "all years"
+        self.stdout.write(
+            self.style.SUCCESS(f"Broadsheet summary rebuilt for {scope}: {count} rows written.")
+        )
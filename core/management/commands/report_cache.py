@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from core.cache import report_cache
+
+
+class Command(BaseCommand):
+    help = "Show hit/miss statistics of the rendered report cache, or clear it"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--namespace', type=str, default='broadsheet', help="Report namespace (e.g. broadsheet)")
+        parser.add_argument('--clear', action='store_true', help="Remove every cached file of the namespace")
+
+    def handle(self, *args, **kwargs):
+        namespace = kwargs['namespace']
+        if kwargs['clear']:
+            report_cache.invalidate(namespace)
+            self.stdout.write(self.style.SUCCESS(f"Report cache cleared for '{namespace}'."))
+            return
+
+        stats = report_cache.stats(namespace)
+        lookups = stats['hits'] + stats['misses']
+        hit_rate = f"{100 * stats['hits'] / lookups:.1f}%" if lookups else "n/a"
+        self.stdout.write(
+            f"{namespace}: {stats['hits']} hits, {stats['misses']} misses (hit rate {hit_rate}), "
+            f"{stats['entries']} entries, {stats['bytes']} bytes "
+            f"(limit {report_cache.max_bytes} bytes)"
+        )
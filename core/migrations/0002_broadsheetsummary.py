@@ -0,0 +1,85 @@
+# Generated by Django 5.1.4 on 2026-10-17 06:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def populate_broadsheet_summary(apps, schema_editor):
+    InventoryItem = apps.get_model("core", "InventoryItem")
+    BroadsheetSummary = apps.get_model("core", "BroadsheetSummary")
+    rows = (
+        InventoryItem.objects.values("year", "item_id", "office_id")
+        .annotate(total_quantity=Sum("quantity"))
+        .order_by()
+    )
+    BroadsheetSummary.objects.bulk_create(
+        [
+            BroadsheetSummary(
+                year=row["year"],
+                item_id=row["item_id"],
+                office_id=row["office_id"],
+                total_quantity=row["total_quantity"],
+            )
+            for row in rows
+        ],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BroadsheetSummary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "year",
+                    models.PositiveIntegerField(help_text="Year of the inventory"),
+                ),
+                (
+                    "total_quantity",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="Sum of the inventory quantities for this year, item and office.",
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "item",
+                    models.ForeignKey(
+                        help_text="The item from the Register.",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="broadsheet_summaries",
+                        to="core.itemregister",
+                    ),
+                ),
+                (
+                    "office",
+                    models.ForeignKey(
+                        help_text="The office holding the item.",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="broadsheet_summaries",
+                        to="core.office",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("year", "item", "office")},
+            },
+        ),
+        migrations.RunPython(populate_broadsheet_summary, migrations.RunPython.noop),
+    ]
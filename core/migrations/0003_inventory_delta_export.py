@@ -0,0 +1,60 @@
+# Generated by Django 5.1.4 on 2026-10-17 06:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0002_broadsheetsummary"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="InventoryTombstone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "inventory_item_id",
+                    models.BigIntegerField(
+                        help_text="Id of the deleted inventory item."
+                    ),
+                ),
+                (
+                    "office_id",
+                    models.BigIntegerField(
+                        help_text="Office the item was assigned to."
+                    ),
+                ),
+                (
+                    "user_id",
+                    models.BigIntegerField(help_text="User who managed the item."),
+                ),
+                (
+                    "year",
+                    models.PositiveIntegerField(help_text="Year of the inventory"),
+                ),
+                ("deleted_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="inventoryitem",
+            index=models.Index(
+                fields=["updated_at", "id"], name="inventory_updated_at_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="inventorytombstone",
+            index=models.Index(
+                fields=["deleted_at", "id"], name="tombstone_deleted_at_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 5.1.4 on 2026-10-17 06:57
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0004_importjob"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProcessedImport",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("inventory", "Inventory"),
+                            ("register", "Item Register"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "content_hash",
+                    models.CharField(
+                        help_text="SHA-256 of the uploaded file.", max_length=64
+                    ),
+                ),
+                (
+                    "year",
+                    models.PositiveIntegerField(
+                        help_text="Year the file was imported for"
+                    ),
+                ),
+                (
+                    "result",
+                    models.JSONField(
+                        default=dict, help_text="Response body of the import."
+                    ),
+                ),
+                ("imported_at", models.DateTimeField(auto_now=True)),
+                (
+                    "office",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="Target office of an inventory import.",
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="processed_imports",
+                        to="core.office",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        help_text="The user who imported the file.",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="processed_imports",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["content_hash"], name="processed_import_hash_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.4 on 2026-10-17 07:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0005_processedimport"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="importjob",
+            name="attempts",
+            field=models.PositiveIntegerField(
+                default=0, help_text="Times a worker has claimed the job."
+            ),
+        ),
+    ]
@@ -44,13 +44,19 @@ class ItemRegister(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    @staticmethod
+    def generate_item_id():
+        """
+        Generate a new item ID: a UUID formatted as a short string.
+        """
+        return f"OLASS-{uuid.uuid4().hex[:8].upper()}"
+
     def save(self, *args, **kwargs):
         """
         Automatically generate a item ID if it doesn't exist.
         """
         if not self.item_id:
-            # Generate a UUID and format it as a short string
-            self.item_id = f"OLASS-{uuid.uuid4().hex[:8].upper()}"
+            self.item_id = self.generate_item_id()
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -105,6 +111,10 @@ class InventoryItem(models.Model):
     class Meta:
         unique_together = ('user', 'office', 'item_id', 'year')  # Correct reference to 'item_id'
         ordering = ['item_id__name']  # Correct lookup for 'name' field in ItemRegister
+        indexes = [
+            # Keyset scans for the delta export cursor
+            models.Index(fields=['updated_at', 'id'], name='inventory_updated_at_idx'),
+        ]
         constraints = [
             models.CheckConstraint(
                 check=models.Q(quantity__gte=1),  # Ensure quantity is at least 1
@@ -121,3 +131,143 @@ class InventoryItem(models.Model):
             self.description = self.item_id.description
         super().save(*args, **kwargs)  # Call the original save method
 
+
+class BroadsheetSummary(models.Model):
+    """
+    Precomputed total quantity of an item in an office for a given year.
+    Kept up to date from InventoryItem changes and read by the broadsheet.
+    """
+    year = models.PositiveIntegerField(help_text="Year of the inventory")
+    item = models.ForeignKey(
+        ItemRegister,
+        on_delete=models.CASCADE,
+        related_name="broadsheet_summaries",
+        help_text="The item from the Register."
+    )
+    office = models.ForeignKey(
+        Office,
+        on_delete=models.CASCADE,
+        related_name="broadsheet_summaries",
+        help_text="The office holding the item."
+    )
+    total_quantity = models.PositiveIntegerField(
+        default=0,
+        help_text="Sum of the inventory quantities for this year, item and office."
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('year', 'item', 'office')
+
+    def __str__(self):
+        return f"{self.item.name} (Office: {self.office.name}, Year: {self.year}): {self.total_quantity}"
+
+
+class InventoryTombstone(models.Model):
+    """
+    Records a deleted InventoryItem so the delta export can report the deletion.
+    Plain ids are kept (not foreign keys) because the office or user may be gone too.
+    """
+    inventory_item_id = models.BigIntegerField(help_text="Id of the deleted inventory item.")
+    office_id = models.BigIntegerField(help_text="Office the item was assigned to.")
+    user_id = models.BigIntegerField(help_text="User who managed the item.")
+    year = models.PositiveIntegerField(help_text="Year of the inventory")
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['deleted_at', 'id'], name='tombstone_deleted_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"Deleted inventory item {self.inventory_item_id} ({self.deleted_at})"
+
+
+class ImportJob(models.Model):
+    """
+    A spooled upload imported in the background by the `process_import_jobs` worker.
+    Clients poll it for progress, counts and errors.
+    """
+    INVENTORY = "inventory"
+    REGISTER = "register"
+    KIND_CHOICES = [(INVENTORY, "Inventory"), (REGISTER, "Item Register")]
+
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (SUCCEEDED, "Succeeded"),
+        (FAILED, "Failed"),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    user = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name="import_jobs",
+        help_text="The user who uploaded the file."
+    )
+    office = models.ForeignKey(
+        Office,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="import_jobs",
+        help_text="Target office of an inventory import."
+    )
+    file = models.FileField(upload_to="imports/", help_text="The spooled upload.")
+    options = models.JSONField(default=dict, blank=True, help_text="Import options, e.g. dry_run.")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING)
+    stage = models.CharField(max_length=50, blank=True, help_text="Current step of a running job.")
+    processed_rows = models.PositiveIntegerField(default=0)
+    attempts = models.PositiveIntegerField(default=0, help_text="Times a worker has claimed the job.")
+    result = models.JSONField(default=dict, blank=True, help_text="Counts of a finished job.")
+    errors = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id'], name='import_job_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} import #{self.pk} ({self.status})"
+
+
+class ProcessedImport(models.Model):
+    """
+    Content hash and scope of a successfully imported file, with the result returned for it.
+    Identical re-uploads in the same scope get that result back without being imported again.
+    """
+    kind = models.CharField(max_length=20, choices=ImportJob.KIND_CHOICES)
+    content_hash = models.CharField(max_length=64, help_text="SHA-256 of the uploaded file.")
+    user = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name="processed_imports",
+        help_text="The user who imported the file."
+    )
+    office = models.ForeignKey(
+        Office,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="processed_imports",
+        help_text="Target office of an inventory import."
+    )
+    year = models.PositiveIntegerField(help_text="Year the file was imported for")
+    result = models.JSONField(default=dict, help_text="Response body of the import.")
+    imported_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['content_hash'], name='processed_import_hash_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} import {self.content_hash[:12]} ({self.imported_at})"
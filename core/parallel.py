@@ -0,0 +1,44 @@
+"""
+Bounded process pool for CPU-bound report work (rendering shards, parsing sheets).
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.db import connections
+
+
+def run_in_pool(function, tasks, workers=None):
+    """
+    Call `function(*task)` for every task and return the results in task order.
+
+    Tasks run in a process pool of at most `workers` (default `REPORT_WORKERS`) processes,
+    or serially in this process when only one worker or one task is left. `function` must
+    be importable at module level so it can be sent to the workers. Workers open their own
+    database connections; the parent's are closed first so none is shared across a fork.
+    Inside a transaction the tasks also run serially, since closing the connection would
+    abort it and workers could not see its uncommitted rows anyway.
+    """
+    tasks = list(tasks)
+    workers = min(workers or settings.REPORT_WORKERS, len(tasks))
+    if workers <= 1 or any(connection.in_atomic_block for connection in connections.all()):
+        return [function(*task) for task in tasks]
+
+    # Workers connect to the same databases as this process (e.g. the test databases)
+    databases = {
+        alias: connections[alias].settings_dict["NAME"] for alias in connections
+    }
+    connections.close_all()
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=setup_worker, initargs=(databases,)
+    ) as pool:
+        return list(pool.map(function, *zip(*tasks)))
+
+
+def setup_worker(databases):
+    """
+    Set up Django in a pool worker, whatever the process start method.
+    """
+    django.setup()
+    for alias, name in databases.items():
+        connections[alias].settings_dict["NAME"] = name
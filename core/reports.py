@@ -0,0 +1,175 @@
+"""
+Shared rendering engine for the Excel reports (templates, Register, exports, broadsheets).
+
+Cell formatting comes from named styles that are registered once per workbook and applied
+by name, instead of building `Font`/`Alignment` objects for every cell. Sheets are written
+through `ReportSheet`, which works the same on both openpyxl back ends: the in-memory
+workbook and the write-only workbook that streams rows to disk. Simple reports are
+described by a `ReportLayout` (title rows, header row, data rows, footer). Reports with
+more complex headers, like the broadsheets, use `ReportSheet` directly.
+"""
+from collections import namedtuple
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font, NamedStyle
+from openpyxl.utils import get_column_letter
+from openpyxl.worksheet.cell_range import CellRange
+
+CENTERED = Alignment(horizontal="center")
+CENTERED_MIDDLE = Alignment(horizontal="center", vertical="center")
+ROTATED = Alignment(textRotation=90, horizontal="center")
+LABEL_FONT = Font(name="Times New Roman", size=12, bold=True)
+
+# Named styles of every report: name -> NamedStyle arguments
+REPORT_STYLES = {
+    "report_title": {"font": Font(bold=True, size=14), "alignment": CENTERED_MIDDLE},
+    "report_subtitle": {
+        "font": Font(bold=True, italic=True, size=12),
+        "alignment": CENTERED_MIDDLE,
+    },
+    "report_header": {"font": Font(bold=True), "alignment": CENTERED_MIDDLE},
+    "report_footer": {"alignment": CENTERED_MIDDLE},
+    "report_banner": {"font": Font(size=21, bold=True), "alignment": CENTERED},
+    "report_banner_subtitle": {"font": Font(size=17, italic=True), "alignment": CENTERED},
+    "report_label": {"font": LABEL_FONT, "alignment": CENTERED_MIDDLE},
+    "report_label_rotated": {"font": LABEL_FONT, "alignment": ROTATED},
+    "report_bold": {"font": Font(bold=True), "alignment": CENTERED},
+    "report_rotated": {"alignment": ROTATED},
+    "report_centered": {"alignment": CENTERED},
+}
+
+# A value written with a named style
+Styled = namedtuple("Styled", "value style")
+
+
+class ReportWorkbook:
+    """
+    A workbook with the report named styles registered, in-memory or write-only.
+
+    Write-only workbooks stream appended rows to a temporary file and keep memory flat;
+    in-memory workbooks hold every cell. Both produce the same output.
+    """
+
+    def __init__(self, write_only=False):
+        self.write_only = write_only
+        self.workbook = Workbook(write_only=write_only)
+        if not write_only:
+            self.workbook.remove(self.workbook.active)
+        for name, style in REPORT_STYLES.items():
+            self.workbook.add_named_style(NamedStyle(name=name, **style))
+        self.sheets = []
+
+    def sheet(self, title, column_widths=()):
+        """
+        Add a sheet; column widths are set before anything is written, as write-only
+        sheets require.
+        """
+        sheet = ReportSheet(self, title, column_widths)
+        self.sheets.append(sheet)
+        return sheet
+
+    def save(self, output):
+        for sheet in self.sheets:
+            sheet.apply_merges()
+        self.workbook.save(output)
+
+
+class ReportSheet:
+    """
+    Appends rows to one sheet. A row is a list of plain values and `Styled` values.
+
+    Merged ranges can be declared at any time, also ahead of the rows they cover. They are
+    applied when the workbook is saved.
+    """
+
+    def __init__(self, report_workbook, title, column_widths=()):
+        self.write_only = report_workbook.write_only
+        self.sheet = report_workbook.workbook.create_sheet(title)
+        self.row_count = 0
+        self.merges = []
+        for col, width in enumerate(column_widths, start=1):
+            self.sheet.column_dimensions[get_column_letter(col)].width = width
+
+    def append(self, values=()):
+        self.row_count += 1
+        if self.write_only:
+            self.sheet.append([self.write_only_cell(value) for value in values])
+            return
+        self.sheet.append(
+            [value.value if isinstance(value, Styled) else value for value in values]
+        )
+        for col, value in enumerate(values, start=1):
+            if isinstance(value, Styled) and value.style:
+                self.sheet.cell(row=self.row_count, column=col).style = value.style
+
+    def write_only_cell(self, value):
+        if not isinstance(value, Styled):
+            return value
+        cell = WriteOnlyCell(self.sheet, value=value.value)
+        if value.style:
+            cell.style = value.style
+        return cell
+
+    def merge(self, min_row, min_col, max_row, max_col):
+        self.merges.append(
+            CellRange(min_row=min_row, min_col=min_col, max_row=max_row, max_col=max_col)
+        )
+
+    def title(self, value, style, width):
+        """
+        Append a single value merged across the first `width` columns.
+        """
+        self.merge(self.row_count + 1, 1, self.row_count + 1, width)
+        self.append([Styled(value, style)])
+
+    def apply_merges(self):
+        for cell_range in self.merges:
+            if self.write_only:
+                self.sheet.merged_cells.add(cell_range)
+            else:
+                self.sheet.merge_cells(cell_range.coord)
+        self.merges = []
+
+
+class ReportLayout:
+    """
+    Declarative layout of a simple report sheet: title rows merged across all columns, a
+    header row, the data rows and an optional footer merged below a blank row.
+
+    `title_styles` gives the named style of each title row. Data rows are appended as
+    produced, so a generator keeps a write-only report streaming.
+    """
+
+    def __init__(
+        self,
+        headers,
+        title_styles=("report_title", "report_title"),
+        column_widths=(),
+        header_style="report_header",
+        footer_style="report_footer",
+        write_only=False,
+    ):
+        self.headers = headers
+        self.title_styles = title_styles
+        self.column_widths = column_widths
+        self.header_style = header_style
+        self.footer_style = footer_style
+        self.write_only = write_only
+
+    def render(self, output, sheet_title, titles, rows, footer=None):
+        """
+        Write a workbook with one sheet in this layout into `output`.
+        """
+        workbook = ReportWorkbook(write_only=self.write_only)
+        sheet = workbook.sheet(sheet_title, self.column_widths)
+        width = len(self.headers)
+        for value, style in zip(titles, self.title_styles):
+            sheet.title(value, style, width)
+        sheet.append([Styled(header, self.header_style) for header in self.headers])
+        for row in rows:
+            sheet.append(row)
+        if footer is not None:
+            sheet.append()  # Leave a blank row
+            sheet.title(footer, self.footer_style, width)
+        workbook.save(output)
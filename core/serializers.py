@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Office, ItemRegister, InventoryItem
+from .models import Office, ItemRegister, InventoryItem, ImportJob
 
 class OfficeSerializer(serializers.ModelSerializer):
     class Meta:
@@ -26,3 +26,12 @@ class InventoryItemSerializer(serializers.ModelSerializer):
             'remarks', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'user', 'office']
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ImportJob
+        fields = [
+            'id', 'kind', 'office', 'status', 'stage', 'processed_rows', 'result', 'errors',
+            'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
@@ -0,0 +1,37 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from .cache import report_cache
+from .models import InventoryItem, InventoryTombstone, ItemRegister
+from .summary import inventory_summary_key, schedule_summary_refresh
+
+@receiver(post_init, sender=InventoryItem)
+def remember_summary_key(sender, instance, **kwargs):
+    # Keep the key the row was loaded with, so moves between years/offices/items refresh both sides
+    instance._summary_key = inventory_summary_key(instance)
+
+@receiver(post_save, sender=InventoryItem)
+def update_summary_on_save(sender, instance, **kwargs):
+    key = inventory_summary_key(instance)
+    schedule_summary_refresh({instance._summary_key, key})
+    instance._summary_key = key
+
+@receiver(post_delete, sender=InventoryItem)
+def update_summary_on_delete(sender, instance, **kwargs):
+    schedule_summary_refresh({inventory_summary_key(instance), instance._summary_key})
+
+@receiver(post_delete, sender=InventoryItem)
+def record_tombstone_on_delete(sender, instance, **kwargs):
+    # Lets the delta export report deletions to incremental sync clients
+    InventoryTombstone.objects.create(
+        inventory_item_id=instance.pk,
+        office_id=instance.office_id,
+        user_id=instance.user_id,
+        year=instance.year,
+    )
+
+@receiver(post_save, sender=ItemRegister)
+@receiver(post_delete, sender=ItemRegister)
+def invalidate_reports_on_register_change(sender, instance, **kwargs):
+    # Names, descriptions and unit costs appear in every year's broadsheet and every template
+    report_cache.invalidate("broadsheet")
+    report_cache.invalidate("template")
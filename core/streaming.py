@@ -0,0 +1,108 @@
+"""
+Helpers for streaming tabular reports (CSV, NDJSON, Parquet) back to the client.
+"""
+import csv
+import tempfile
+from itertools import islice
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import FileResponse, StreamingHttpResponse
+
+TABULAR_FORMATS = ("csv", "ndjson", "parquet")
+
+
+class Echo:
+    """
+    File-like object whose write() returns the value, so csv.writer can feed a generator.
+    """
+
+    def write(self, value):
+        return value
+
+
+def streaming_csv_response(header, rows, filename):
+    """
+    Stream `header` followed by every row of the `rows` iterable as a CSV attachment.
+    Rows are encoded one at a time, so memory does not grow with the report size.
+    """
+    writer = csv.writer(Echo())
+
+    def generate():
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(generate(), content_type="text/csv")
+    response["Content-Disposition"] = f"attachment; filename={filename}"
+    return response
+
+
+def streaming_ndjson_response(header, rows, filename):
+    """
+    Stream every row of the `rows` iterable as one JSON object per line, keyed by `header`.
+    Dates and decimals are encoded the way Django's JSON encoder does (ISO 8601, strings).
+    """
+    encoder = DjangoJSONEncoder()
+
+    def generate():
+        for row in rows:
+            yield encoder.encode(dict(zip(header, row))) + "\n"
+
+    response = StreamingHttpResponse(generate(), content_type="application/x-ndjson")
+    response["Content-Disposition"] = f"attachment; filename={filename}"
+    return response
+
+
+def parquet_response(columns, rows, filename, chunk_size=10000):
+    """
+    Write the `rows` iterable to a Parquet file, one row group per chunk, and stream it back.
+
+    `columns` is a list of (name, pandas dtype) pairs; fixing the dtypes keeps the schema of
+    every chunk identical, even when a chunk only holds empty values in a column. Requires
+    pyarrow (ImportError otherwise).
+    """
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    names = [name for name, _ in columns]
+    dtypes = dict(columns)
+    output = tempfile.TemporaryFile()
+    writer = None
+    try:
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk and writer is not None:
+                break
+            frame = pd.DataFrame(chunk, columns=names).astype(dtypes)
+            table = pa.Table.from_pandas(
+                frame, schema=writer.schema if writer else None, preserve_index=False
+            )
+            if writer is None:
+                writer = pq.ParquetWriter(output, table.schema)
+            writer.write_table(table)
+            if len(chunk) < chunk_size:
+                break
+        writer.close()
+        output.seek(0)
+    except Exception:
+        output.close()
+        raise
+
+    response = FileResponse(output, content_type="application/vnd.apache.parquet")
+    response["Content-Disposition"] = f"attachment; filename={filename}"
+    return response
+
+
+def tabular_response(output_format, columns, rows, filename):
+    """
+    Stream `rows` in one of `TABULAR_FORMATS`; `columns` is a list of (name, pandas dtype).
+    `filename` is given without extension.
+    """
+    header = [name for name, _ in columns]
+    if output_format == "csv":
+        return streaming_csv_response(header, rows, f"{filename}.csv")
+    if output_format == "ndjson":
+        return streaming_ndjson_response(header, rows, f"{filename}.ndjson")
+    return parquet_response(columns, rows, f"{filename}.parquet")
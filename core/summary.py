@@ -0,0 +1,161 @@
+"""
+Maintenance of the precomputed BroadsheetSummary table.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .cache import report_cache
+from .models import BroadsheetSummary, InventoryItem
+
+# Keys collected by an active `batched_summary_refresh` block
+_pending_keys = ContextVar("pending_summary_keys", default=None)
+
+
+def inventory_summary_key(item):
+    """
+    Return the (year, item pk, office pk) summary key an InventoryItem contributes to.
+    Deferred fields are reported as None rather than loaded.
+    """
+    return tuple(item.__dict__.get(attname) for attname in ("year", "item_id_id", "office_id"))
+
+
+def refresh_broadsheet_summary(keys):
+    """
+    Recompute the summary rows for the given (year, item pk, office pk) keys from InventoryItem.
+
+    Used after saves, deletes and bulk writes. Keys without inventory left are removed and
+    cached broadsheets of the affected years are invalidated.
+
+    A summary row is ensured for every key and all of them are locked before the inventory
+    is read. A concurrent refresh of the same keys (e.g. an import still in its transaction)
+    therefore finishes first, and this one then sees its committed rows. The last refresh
+    always writes complete totals.
+    """
+    keys = {key for key in keys if None not in key}
+    if not keys:
+        return
+
+    years = {year for year, _, _ in keys}
+    items = {item for _, item, _ in keys}
+    offices = {office for _, _, office in keys}
+
+    with transaction.atomic():
+        BroadsheetSummary.objects.bulk_create(
+            [
+                BroadsheetSummary(year=year, item_id=item, office_id=office)
+                for year, item, office in sorted(keys)
+            ],
+            ignore_conflicts=True,
+        )
+        summaries = [
+            summary
+            for summary in BroadsheetSummary.objects.select_for_update()
+            .filter(year__in=years, item_id__in=items, office_id__in=offices)
+            .order_by("id")
+            if (summary.year, summary.item_id, summary.office_id) in keys
+        ]
+
+        totals = {
+            (row["year"], row["item_id"], row["office_id"]): row["total_quantity"]
+            for row in InventoryItem.objects.filter(
+                year__in=years, item_id__in=items, office_id__in=offices
+            )
+            .values("year", "item_id", "office_id")
+            .annotate(total_quantity=Sum("quantity"))
+            .order_by()
+        }
+
+        now = timezone.now()
+        stale = []
+        for summary in summaries:
+            total = totals.get((summary.year, summary.item_id, summary.office_id))
+            if total:
+                summary.total_quantity = total
+                summary.updated_at = now  # bulk_update does not apply auto_now
+            else:
+                stale.append(summary.pk)
+        if stale:
+            BroadsheetSummary.objects.filter(id__in=stale).delete()
+        BroadsheetSummary.objects.bulk_update(
+            [summary for summary in summaries if summary.pk not in stale],
+            ["total_quantity", "updated_at"],
+        )
+
+    for year in years:
+        report_cache.invalidate("broadsheet", year)
+
+
+@contextmanager
+def batched_summary_refresh():
+    """
+    Run the block in a transaction and refresh the summary keys touched by its saves and
+    deletes once at its end, instead of once per row (cascades and queryset deletes fire one
+    signal per row). The refresh commits together with the writes, so readers never see the
+    new inventory with the old summary, and a failed refresh rolls the writes back. Nested
+    blocks join the outermost one.
+    """
+    if _pending_keys.get() is not None:
+        yield
+        return
+    keys = set()
+    token = _pending_keys.set(keys)
+    try:
+        with transaction.atomic():
+            yield
+            _pending_keys.reset(token)
+            token = None
+            refresh_broadsheet_summary(keys)
+    finally:
+        if token is not None:
+            _pending_keys.reset(token)
+
+
+def schedule_summary_refresh(keys):
+    """
+    Refresh the summary for `keys` now, or at the end of the enclosing
+    `batched_summary_refresh` block.
+    """
+    pending = _pending_keys.get()
+    if pending is None:
+        refresh_broadsheet_summary(keys)
+    else:
+        pending.update(keys)
+
+
+def rebuild_broadsheet_summary(year=None, batch_size=2000):
+    """
+    Rebuild the summary table from scratch (optionally for a single year).
+    Returns the number of summary rows written.
+    """
+    inventory = InventoryItem.objects.all()
+    summaries = BroadsheetSummary.objects.all()
+    if year is not None:
+        inventory = inventory.filter(year=year)
+        summaries = summaries.filter(year=year)
+
+    rows = (
+        inventory.values("year", "item_id", "office_id")
+        .annotate(total_quantity=Sum("quantity"))
+        .order_by()
+    )
+    with transaction.atomic():
+        summaries.delete()
+        created = BroadsheetSummary.objects.bulk_create(
+            (
+                BroadsheetSummary(
+                    year=row["year"],
+                    item_id=row["item_id"],
+                    office_id=row["office_id"],
+                    total_quantity=row["total_quantity"],
+                )
+                for row in rows.iterator(chunk_size=batch_size)
+            ),
+            batch_size=batch_size,
+        )
+
+    report_cache.invalidate("broadsheet", year)
+    return len(created)
@@ -0,0 +1,98 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from accounts.models import CustomUser
+from core.models import BroadsheetSummary, InventoryItem, ItemRegister, Office
+from core.summary import batched_summary_refresh
+
+
+class BroadsheetSummaryTest(TestCase):
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username="staff", password="test123")
+        self.other_user = CustomUser.objects.create_user(username="staff2", password="test123")
+        self.office1 = Office.objects.create(name="Bursary", department="Finance")
+        self.office2 = Office.objects.create(name="Registry", department="Admin")
+        self.laptop = ItemRegister.objects.create(name="Laptop")
+
+    def summary(self):
+        return {
+            (row.year, row.office.name): row.total_quantity
+            for row in BroadsheetSummary.objects.filter(item=self.laptop)
+        }
+
+    def test_summary_follows_create_update_delete(self):
+        first = InventoryItem.objects.create(
+            user=self.user, office=self.office1, item_id=self.laptop, quantity=3, year=2025
+        )
+        InventoryItem.objects.create(
+            user=self.other_user, office=self.office1, item_id=self.laptop, quantity=2, year=2025
+        )
+        self.assertEqual(self.summary(), {(2025, "Bursary"): 5})
+
+        first.quantity = 4
+        first.save()
+        self.assertEqual(self.summary(), {(2025, "Bursary"): 6})
+
+        # Moving a row to another office updates both cells
+        first = InventoryItem.objects.get(pk=first.pk)
+        first.office = self.office2
+        first.save()
+        self.assertEqual(self.summary(), {(2025, "Bursary"): 2, (2025, "Registry"): 4})
+
+        first.delete()
+        self.assertEqual(self.summary(), {(2025, "Bursary"): 2})
+
+    def test_rebuild_command(self):
+        InventoryItem.objects.bulk_create(
+            [
+                InventoryItem(user=self.user, office=self.office1, item_id=self.laptop, quantity=3, year=2024),
+                InventoryItem(user=self.user, office=self.office2, item_id=self.laptop, quantity=1, year=2025),
+            ]
+        )
+        # bulk_create bypasses signals, so the summary is stale until rebuilt
+        self.assertEqual(self.summary(), {})
+
+        call_command("rebuild_broadsheet_summary", stdout=StringIO())
+        self.assertEqual(self.summary(), {(2024, "Bursary"): 3, (2025, "Registry"): 1})
+
+    def test_batched_refresh_of_cascade_delete(self):
+        items = [ItemRegister.objects.create(name=f"Item {index}") for index in range(10)]
+        for item in items:
+            InventoryItem.objects.create(
+                user=self.user, office=self.office2, item_id=item, quantity=2, year=2025
+            )
+        InventoryItem.objects.create(
+            user=self.user, office=self.office1, item_id=self.laptop, quantity=1, year=2025
+        )
+        self.assertEqual(BroadsheetSummary.objects.filter(office=self.office2).count(), 10)
+
+        # Deleting the office cascades to its ten rows; the summary is refreshed once
+        with CaptureQueriesContext(connection) as queries, batched_summary_refresh():
+            self.office2.delete()
+        aggregates = [query for query in queries.captured_queries if "SUM(" in query["sql"]]
+        self.assertEqual(len(aggregates), 1)
+        self.assertEqual(
+            list(BroadsheetSummary.objects.values_list("item__name", "total_quantity")),
+            [("Laptop", 1)],
+        )
+
+        # The refresh commits with the delete: if it fails, the delete is rolled back too
+        with mock.patch(
+            "core.summary.refresh_broadsheet_summary", side_effect=RuntimeError
+        ), self.assertRaises(RuntimeError), batched_summary_refresh():
+            self.office1.delete()
+        self.assertTrue(Office.objects.filter(name="Bursary").exists())
+        self.assertEqual(InventoryItem.objects.count(), 1)
+
+        # A summary that drifted is corrected by the next refresh of its key
+        BroadsheetSummary.objects.update(total_quantity=7)
+        laptop_row = InventoryItem.objects.get(item_id=self.laptop)
+        laptop_row.remarks = "Good"
+        laptop_row.save()
+        self.assertEqual(self.summary(), {(2025, "Bursary"): 1})
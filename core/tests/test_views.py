@@ -0,0 +1,1122 @@
+import base64
+import csv
+import json
+import tempfile
+import threading
+import time
+import zipfile
+from datetime import timedelta
+from decimal import Decimal
+from importlib.util import find_spec
+from io import BytesIO, StringIO
+from unittest import skipUnless
+from urllib.parse import urlencode
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from openpyxl import Workbook, load_workbook
+from rest_framework import status
+from rest_framework.test import APITestCase, APITransactionTestCase
+
+from accounts.models import CustomUser, Organization
+from core.broadsheet import BroadsheetPivot, broadsheet_valuation
+from core.cache import report_cache
+from core.imports import InventoryImportError, import_office_workbook
+from core.models import (
+    BroadsheetSummary,
+    ImportJob,
+    InventoryItem,
+    InventoryTombstone,
+    ItemRegister,
+    Office,
+)
+from core.views import BroadsheetView, ExportInventoryView
+
+
+def response_bytes(response):
+    if response.streaming:
+        return b"".join(response.streaming_content)
+    return response.content
+
+
+class BroadsheetViewTest(APITestCase):
+
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        settings_override = override_settings(REPORT_CACHE_DIR=cache_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.organization = Organization.objects.create(name="Test Org")
+        self.admin_user = CustomUser.objects.create_user(
+            username="admin", password="test123", role="admin", organization=self.organization
+        )
+        self.staff_user = CustomUser.objects.create_user(
+            username="staff", password="test123", role="staff"
+        )
+
+        self.office1 = Office.objects.create(name="Bursary", department="Finance")
+        self.office2 = Office.objects.create(name="Audit", department="Finance")
+        self.office3 = Office.objects.create(name="Registry", department="Admin")
+
+        self.laptop = ItemRegister.objects.create(name="Laptop", unit_cost=500)
+        self.chair = ItemRegister.objects.create(name="Chair", unit_cost=20)
+
+        InventoryItem.objects.create(
+            user=self.staff_user, office=self.office1, item_id=self.laptop, quantity=3, year=2025
+        )
+        InventoryItem.objects.create(
+            user=self.admin_user, office=self.office1, item_id=self.laptop, quantity=2, year=2025
+        )
+        InventoryItem.objects.create(
+            user=self.staff_user, office=self.office3, item_id=self.laptop, quantity=1, year=2025
+        )
+        InventoryItem.objects.create(
+            user=self.staff_user, office=self.office2, item_id=self.chair, quantity=7, year=2025
+        )
+        # Another year must not leak into the 2025 broadsheet
+        InventoryItem.objects.create(
+            user=self.staff_user, office=self.office2, item_id=self.chair, quantity=9, year=2024
+        )
+
+    def test_pivot_builds_item_office_matrix(self):
+        view = BroadsheetView()
+        department_offices = view.get_department_offices(2025)
+        pivot = BroadsheetPivot(view.aggregate_inventory_data(2025), department_offices)
+
+        self.assertCountEqual(pivot.offices, ["Registry", "Audit", "Bursary"])
+
+        rows = list(pivot.rows())
+        self.assertEqual([item["name"] for item, _, _ in rows], ["Chair", "Laptop"])
+        quantities = {item["name"]: dict(zip(pivot.offices, q)) for item, q, _ in rows}
+        self.assertEqual(quantities["Laptop"], {"Registry": 1, "Audit": None, "Bursary": 5})
+        self.assertEqual(quantities["Chair"], {"Registry": None, "Audit": 7, "Bursary": None})
+        self.assertEqual([total for _, _, total in rows], [7, 6])
+
+    def test_department_offices_single_query(self):
+        view = BroadsheetView()
+        with self.assertNumQueries(1):
+            department_offices = view.get_department_offices(2025)
+        self.assertEqual(
+            department_offices,
+            {"Admin": ["Registry"], "Finance": ["Audit", "Bursary"]},
+        )
+
+        # More departments must not add queries
+        for index in range(5):
+            office = Office.objects.create(name=f"Office {index}", department=f"Dept {index}")
+            InventoryItem.objects.create(
+                user=self.staff_user, office=office, item_id=self.chair, quantity=1, year=2025
+            )
+        with self.assertNumQueries(1):
+            department_offices = view.get_department_offices(2025)
+        self.assertEqual(len(department_offices), 7)
+
+    def test_broadsheet_excel(self):
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.get("/api/broadsheet/", {"year": 2025})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        sheet = load_workbook(BytesIO(response_bytes(response))).active
+        self.assertEqual(sheet.cell(row=1, column=1).value, "TEST ORG")
+
+        office_columns = {
+            sheet.cell(row=4, column=col).value: col for col in range(5, 8)
+        }
+        laptop_row = next(
+            row for row in range(5, sheet.max_row + 1) if sheet.cell(row=row, column=3).value == "Laptop"
+        )
+        self.assertEqual(sheet.cell(row=laptop_row, column=office_columns["Bursary"]).value, 5)
+        self.assertEqual(sheet.cell(row=laptop_row, column=office_columns["Registry"]).value, 1)
+        self.assertIsNone(sheet.cell(row=laptop_row, column=office_columns["Audit"]).value)
+        self.assertEqual(sheet.cell(row=laptop_row, column=8).value, 6)
+        self.assertEqual(sheet.cell(row=laptop_row, column=9).value, 500)
+        self.assertEqual(sheet.cell(row=laptop_row, column=10).value, 3000)
+
+        # Closing row holds the department subtotals and the grand total
+        self.assertEqual(sheet.cell(row=sheet.max_row, column=1).value, "TOTAL VALUE")
+        self.assertEqual(sheet.cell(row=sheet.max_row, column=10).value, 3140)
+
+        # Department headers are merged across their offices
+        merged = {str(cell_range) for cell_range in sheet.merged_cells.ranges}
+        self.assertIn("A1:J1", merged)
+        self.assertIn("A3:A4", merged)
+        self.assertTrue("E3:F3" in merged or "F3:G3" in merged)
+        self.assertEqual(sheet.cell(row=4, column=5).alignment.textRotation, 90)
+
+    def test_broadsheet_valuation(self):
+        department_values, grand_total = broadsheet_valuation(2025)
+        self.assertEqual(department_values, {"Finance": Decimal("2640.00"), "Admin": Decimal("500.00")})
+        self.assertEqual(grand_total, Decimal("3140.00"))
+
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.get("/api/broadsheet/", {"year": 2025, "format": "json"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(data["grand_total"], "3140.00")
+        laptop = next(item for item in data["items"] if item["name"] == "Laptop")
+        self.assertEqual(laptop["quantities"], {"Bursary": 5, "Registry": 1})
+        self.assertEqual(laptop["total_value"], "3000.00")
+        self.assertEqual(
+            {dept["department"]: dept["total_value"] for dept in data["departments"]},
+            {"Finance": "2640.00", "Admin": "500.00"},
+        )
+
+    def test_broadsheet_csv(self):
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.get("/api/broadsheet/", {"year": 2025, "format": "csv"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/csv")
+
+        rows = list(csv.reader(StringIO(response_bytes(response).decode())))
+        header, laptop = rows[0], rows[2]
+        self.assertEqual(header[:4], ["S/N", "ITEM ID", "ITEM NAME", "DESCRIPTION"])
+        self.assertEqual(header[-3:], ["TOTAL", "UNIT", "VALUE"])
+        quantities = dict(zip(header[4:-3], laptop[4:-3]))
+        self.assertEqual(quantities, {"Registry": "1", "Audit": "", "Bursary": "5"})
+        self.assertEqual(laptop[-3:], ["6", "500.00", "3000.00"])
+
+    def test_broadsheet_year_comparison(self):
+        view = BroadsheetView()
+        with self.assertNumQueries(1):
+            rows = list(view.aggregate_comparative_data([2024, 2025]))
+        self.assertEqual({row["year"] for row in rows}, {2024, 2025})
+
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.get("/api/broadsheet/", {"years": "2025,2024", "format": "json"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(data["years"], [2024, 2025])
+        chair = next(item for item in data["items"] if item["name"] == "Chair")
+        self.assertEqual(chair["quantities"], {"Audit": {"2024": 9, "2025": 7}})
+        self.assertEqual(chair["changes"], {"Audit": {"2024-2025": -2}})
+        laptop = next(item for item in data["items"] if item["name"] == "Laptop")
+        self.assertEqual(laptop["quantities"]["Bursary"], {"2024": None, "2025": 5})
+        self.assertEqual(laptop["total_changes"], {"2024-2025": 6})
+
+        response = self.client.get("/api/broadsheet/", {"years": "2024,2025", "format": "csv"})
+        rows = list(csv.reader(StringIO(response_bytes(response).decode())))
+        header, chair = rows[0], dict(zip(rows[0], rows[1]))
+        self.assertEqual(header[-3:], ["TOTAL 2024", "TOTAL 2025", "TOTAL CHANGE 2024-2025"])
+        self.assertEqual(
+            [chair["Audit 2024"], chair["Audit 2025"], chair["Audit CHANGE 2024-2025"]],
+            ["9", "7", "-2"],
+        )
+
+        response = self.client.get("/api/broadsheet/", {"years": "2024,2025"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        sheet = load_workbook(BytesIO(response_bytes(response))).active
+        self.assertEqual(sheet.cell(row=4, column=5).value, "2024")
+        self.assertEqual(sheet.cell(row=4, column=7).value, "CHANGE 2024-2025")
+
+        response = self.client.get("/api/broadsheet/", {"years": "2024,x"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get("/api/broadsheet/", {"years": "2024"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_broadsheet_window(self):
+        self.client.force_authenticate(user=self.admin_user)
+        params = {"year": 2025, "row_offset": 1, "row_limit": 1, "col_offset": 1, "col_limit": 2}
+        response = self.client.get("/api/broadsheet/window/", params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual((data["total_rows"], data["total_columns"]), (2, 3))
+        self.assertEqual([column["office"] for column in data["columns"]], ["Audit", "Bursary"])
+        self.assertEqual(len(data["rows"]), 1)
+        laptop = data["rows"][0]
+        self.assertEqual((laptop["serial_number"], laptop["name"]), (2, "Laptop"))
+        self.assertEqual(laptop["quantities"], [None, 5])
+        self.assertEqual((laptop["total_quantity"], laptop["total_value"]), (6, "3000.00"))
+
+        # Once the year's layout is cached, scrolling only checks the version and fetches
+        # the window's cells: nothing is grouped over the whole year
+        for offset in (0, 1):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(
+                    "/api/broadsheet/window/", {**params, "row_offset": offset}
+                )
+            self.assertEqual(len(queries), 5)
+            self.assertFalse(any("GROUP BY" in query["sql"] for query in queries))
+        self.assertEqual(response.json()["rows"][0]["name"], "Laptop")
+
+        # A change in the year gives a new version and a fresh layout
+        InventoryItem.objects.create(
+            user=self.admin_user, office=self.office3, item_id=self.laptop, quantity=4, year=2025
+        )
+        laptop = self.client.get("/api/broadsheet/window/", params).json()["rows"][0]
+        self.assertEqual(laptop["total_quantity"], 10)
+
+        response = self.client.get("/api/broadsheet/window/", {"year": 2025, "row_limit": "x"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_broadsheet_conditional_requests(self):
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.get("/api/broadsheet/", {"year": 2025, "format": "json"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response["ETag"]
+        self.assertIn("Last-Modified", response)
+
+        # Unchanged data: 304 without running the aggregation queries
+        with self.assertNumQueries(4):
+            response = self.client.get(
+                "/api/broadsheet/", {"year": 2025, "format": "json"}, HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Each format has its own representation
+        response = self.client.get(
+            "/api/broadsheet/", {"year": 2025, "format": "csv"}, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        InventoryItem.objects.filter(year=2025, item_id=self.chair).delete()
+        response = self.client.get(
+            "/api/broadsheet/", {"year": 2025, "format": "json"}, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_broadsheet_if_modified_since_across_deletion(self):
+        self.client.force_authenticate(user=self.admin_user)
+        ItemRegister.objects.update(updated_at=timezone.now() - timedelta(hours=2))
+        InventoryItem.objects.update(updated_at=timezone.now() - timedelta(hours=2))
+        newest = InventoryItem.objects.create(
+            user=self.admin_user, office=self.office3, item_id=self.chair, quantity=9, year=2025
+        )
+        InventoryItem.objects.filter(pk=newest.pk).update(
+            updated_at=timezone.now() - timedelta(hours=1)
+        )
+        for path in ("/api/broadsheet/", "/api/broadsheet/window/"):
+            response = self.client.get(path, {"year": 2025, "format": "json"})
+            last_modified = response["Last-Modified"]
+            response = self.client.get(
+                path, {"year": 2025, "format": "json"}, HTTP_IF_MODIFIED_SINCE=last_modified
+            )
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Deleting the newest row must not take Last-Modified back to an older row
+        newest.delete()
+        for path in ("/api/broadsheet/", "/api/broadsheet/window/"):
+            response = self.client.get(
+                path, {"year": 2025, "format": "json"}, HTTP_IF_MODIFIED_SINCE=last_modified
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_broadsheet_artifact_cache(self):
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.get("/api/broadsheet/", {"year": 2025})
+        first = response_bytes(response)
+        self.assertEqual(response["X-Report-Cache"], "MISS")
+
+        response = self.client.get("/api/broadsheet/", {"year": 2025})
+        self.assertEqual(response["X-Report-Cache"], "HIT")
+        self.assertEqual(response_bytes(response), first)
+
+        # Inventory changes for the year invalidate the cached workbook
+        InventoryItem.objects.create(
+            user=self.admin_user, office=self.office3, item_id=self.chair, quantity=4, year=2025
+        )
+        response = self.client.get("/api/broadsheet/", {"year": 2025})
+        self.assertEqual(response["X-Report-Cache"], "MISS")
+        response_bytes(response)
+
+        stats = report_cache.stats("broadsheet")
+        self.assertEqual(stats["entries"], 1)
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 2))
+
+        # Counters live next to the entries, so the command sees the web process's counts
+        output = StringIO()
+        call_command("report_cache", namespace="broadsheet", stdout=output)
+        self.assertIn("1 hits, 2 misses (hit rate 33.3%)", output.getvalue())
+
+    def test_report_cache_evicts_least_recently_used(self):
+        with override_settings(REPORT_CACHE_MAX_BYTES=250):
+            for year in (2021, 2022, 2023):
+                report_cache.store("broadsheet", year, (year,), lambda output: output.write(b"x" * 100)).close()
+            self.assertIsNone(report_cache.open("broadsheet", 2021, (2021,)))
+            cached_file = report_cache.open("broadsheet", 2023, (2023,))
+            self.assertEqual(cached_file.read(), b"x" * 100)
+            cached_file.close()
+
+    def test_concurrent_render_is_coalesced(self):
+        key = (2025, "Test Org", "v1")
+        lock_held = threading.Event()
+
+        def other_worker():
+            with report_cache.render_lock("broadsheet", key):
+                lock_held.set()
+                time.sleep(0.3)
+                report_cache.store("broadsheet", 2025, key, lambda output: output.write(b"shared")).close()
+
+        worker = threading.Thread(target=other_worker)
+        worker.start()
+        lock_held.wait()
+
+        def render(output):
+            raise AssertionError("The waiting request must not render the report again")
+
+        cached_file, cache_status = report_cache.open_or_render("broadsheet", 2025, key, render)
+        worker.join()
+        with cached_file:
+            self.assertEqual(cached_file.read(), b"shared")
+        self.assertEqual(cache_status, "COALESCED")
+
+    def test_broadsheet_requires_admin(self):
+        self.client.force_authenticate(user=self.staff_user)
+        response = self.client.get("/api/broadsheet/", {"year": 2025})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class ExportInventoryViewTest(APITestCase):
+
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        settings_override = override_settings(REPORT_CACHE_DIR=cache_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.organization = Organization.objects.create(name="Test Org")
+        self.admin_user = CustomUser.objects.create_user(
+            username="admin", password="test123", role="admin", organization=self.organization
+        )
+        self.other_admin = CustomUser.objects.create_user(
+            username="auditor", password="test123", role="admin", organization=self.organization
+        )
+        self.staff_user = CustomUser.objects.create_user(
+            username="staff", password="test123", role="staff"
+        )
+        self.office = Office.objects.create(name="Bursary", department="Finance")
+        self.staff_user.assigned_offices.add(self.office)
+
+        self.laptop = ItemRegister.objects.create(name="Laptop", description="Work laptop")
+        self.chair = ItemRegister.objects.create(name="Chair")
+        InventoryItem.objects.create(
+            user=self.staff_user, office=self.office, item_id=self.laptop, quantity=3, remarks="Good"
+        )
+        InventoryItem.objects.create(
+            user=self.admin_user, office=self.office, item_id=self.chair, quantity=2
+        )
+
+    def export(self, user, **params):
+        self.client.force_authenticate(user=user)
+        response = self.client.get("/api/export/", params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, load_workbook(BytesIO(response_bytes(response))).active
+
+    def test_admin_export(self):
+        response, sheet = self.export(self.admin_user)
+        rows = [
+            row for row in sheet.iter_rows(min_row=4, values_only=True) if row[1]
+        ]
+        self.assertEqual(
+            [(row[2], row[3]) for row in rows], [("Chair", 2), ("Laptop", 3)]
+        )
+        self.assertEqual(sheet.cell(row=sheet.max_row, column=1).value, "Exported by: admin")
+
+    def test_export_render_is_one_query(self):
+        for index in range(10):
+            item = ItemRegister.objects.create(name=f"Item {index}")
+            InventoryItem.objects.create(
+                user=self.admin_user, office=self.office, item_id=item, quantity=1
+            )
+
+        output = BytesIO()
+        with self.assertNumQueries(1):
+            ExportInventoryView().render_excel(
+                output, InventoryItem.objects.all(), None, "Test Org"
+            )
+        sheet = load_workbook(output).active
+        self.assertEqual(sheet.cell(row=4, column=3).value, "Chair")
+        self.assertEqual(sheet.cell(row=15, column=3).value, "Laptop")
+        self.assertIn("A1:H1", {str(cell_range) for cell_range in sheet.merged_cells.ranges})
+
+    def test_identical_exports_share_one_render(self):
+        response, _ = self.export(self.admin_user)
+        self.assertEqual(response["X-Report-Cache"], "MISS")
+
+        # Another admin gets the shared workbook with their own footer
+        response, sheet = self.export(self.other_admin)
+        self.assertEqual(response["X-Report-Cache"], "HIT")
+        self.assertEqual(sheet.cell(row=sheet.max_row, column=1).value, "Exported by: auditor")
+
+        # Hits are patched while they are streamed, and every part stays deflated
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.get("/api/export/")
+        self.assertTrue(response.streaming)
+        with zipfile.ZipFile(BytesIO(response_bytes(response))) as archive:
+            compression = {info.compress_type for info in archive.infolist()}
+        self.assertEqual(compression, {zipfile.ZIP_DEFLATED})
+
+    def test_export_tabular_formats(self):
+        self.client.force_authenticate(user=self.staff_user)
+        response = self.client.get("/api/export/", {"office_id": self.office.id, "format": "csv"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = list(csv.DictReader(StringIO(response_bytes(response).decode())))
+        self.assertEqual([(row["item_name"], row["quantity"]) for row in rows], [("Laptop", "3")])
+
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.get("/api/export/", {"format": "ndjson"})
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in response_bytes(response).decode().splitlines()]
+        self.assertEqual([row["item_name"] for row in rows], ["Chair", "Laptop"])
+        self.assertEqual(rows[1]["remarks"], "Good")
+        self.assertEqual(rows[1]["item_id"], self.laptop.item_id)
+
+        response = self.client.get("/api/register/download/", {"format": "csv"})
+        rows = list(csv.DictReader(StringIO(response_bytes(response).decode())))
+        self.assertEqual([row["name"] for row in rows], ["Laptop", "Chair"])
+
+        response = self.client.get("/api/export/", {"format": "pdf"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @skipUnless(find_spec("pyarrow"), "pyarrow is not installed")
+    def test_export_parquet(self):
+        import pandas as pd
+
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.get("/api/export/", {"format": "parquet"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        frame = pd.read_parquet(BytesIO(response_bytes(response)))
+        self.assertEqual(list(frame["item_name"]), ["Chair", "Laptop"])
+        self.assertEqual(list(frame["quantity"]), [2, 3])
+
+    @override_settings(DELTA_SETTLE_SECONDS=0)
+    def test_delta_export(self):
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.get("/api/export/delta/", {"limit": 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(len(data["changes"]), 1)
+        self.assertTrue(data["has_more"])
+
+        data = self.client.get("/api/export/delta/", {"updated_since": data["next_cursor"]}).json()
+        self.assertEqual(len(data["changes"]), 1)
+        self.assertFalse(data["has_more"])
+        cursor = data["next_cursor"]
+        data = self.client.get("/api/export/delta/", {"updated_since": cursor}).json()
+        self.assertEqual((data["changes"], data["deletions"]), ([], []))
+
+        # Only the changed row and a tombstone for the deleted one come back
+        laptop_row = InventoryItem.objects.get(item_id=self.laptop)
+        laptop_row.quantity = 4
+        laptop_row.save()
+        chair_row = InventoryItem.objects.get(item_id=self.chair)
+        chair_id = chair_row.id
+        chair_row.delete()
+        data = self.client.get("/api/export/delta/", {"updated_since": cursor}).json()
+        self.assertEqual(
+            [(row["item_name"], row["quantity"]) for row in data["changes"]], [("Laptop", 4)]
+        )
+        self.assertEqual([row["id"] for row in data["deletions"]], [chair_id])
+
+        # Staff only see their own rows and deletions
+        self.client.force_authenticate(user=self.staff_user)
+        data = self.client.get(
+            "/api/export/delta/", {"office_id": self.office.id, "updated_since": "2000-01-01T00:00:00"}
+        ).json()
+        self.assertEqual([row["item_name"] for row in data["changes"]], ["Laptop"])
+        self.assertEqual(data["deletions"], [])
+
+        response = self.client.get(
+            "/api/export/delta/", {"office_id": self.office.id, "updated_since": "not-a-cursor"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # Cursors that decode but do not hold two [timestamp, id] positions are rejected
+        for positions in ([["x", 1], [None, 0]], [[None, 0]], [[None, "1"], [None, 0]], {"a": 1}):
+            cursor = base64.urlsafe_b64encode(json.dumps(positions).encode()).decode()
+            response = self.client.get(
+                "/api/export/delta/", {"office_id": self.office.id, "updated_since": cursor}
+            )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # Old tombstones are pruned
+        InventoryTombstone.objects.update(deleted_at=timezone.now() - timedelta(days=400))
+        call_command("prune_tombstones", days=90, stdout=StringIO())
+        self.assertFalse(InventoryTombstone.objects.exists())
+
+    @override_settings(DELTA_SETTLE_SECONDS=60)
+    def test_delta_export_waits_for_late_commits(self):
+        self.client.force_authenticate(user=self.admin_user)
+        now = timezone.now()
+        InventoryItem.objects.update(updated_at=now - timedelta(minutes=10))
+        cursor = self.client.get("/api/export/delta/").json()["next_cursor"]
+
+        # A row saved just now is held back, and the cursor stays behind it
+        laptop_row = InventoryItem.objects.get(item_id=self.laptop)
+        laptop_row.quantity = 5
+        laptop_row.save()
+        data = self.client.get("/api/export/delta/", {"updated_since": cursor}).json()
+        self.assertEqual(data["changes"], [])
+        self.assertEqual(data["next_cursor"], cursor)
+
+        # A write timestamped earlier commits late; once both settle, both come back
+        InventoryItem.objects.filter(item_id=self.chair).update(
+            quantity=6, updated_at=now - timedelta(seconds=30)
+        )
+        InventoryItem.objects.update(updated_at=F("updated_at") - timedelta(minutes=2))
+        data = self.client.get("/api/export/delta/", {"updated_since": cursor}).json()
+        self.assertEqual(
+            [(row["item_name"], row["quantity"]) for row in data["changes"]],
+            [("Chair", 6), ("Laptop", 5)],
+        )
+
+    @override_settings(REPORT_WORKERS=1)
+    def test_export_split_by_office(self):
+        registry = Office.objects.create(name="Registry", department="Admin")
+        InventoryItem.objects.create(
+            user=self.admin_user, office=registry, item_id=self.laptop, quantity=1
+        )
+        Office.objects.create(name="Empty Office")
+
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.get("/api/export/", {"split": "office"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/zip")
+
+        archive = zipfile.ZipFile(BytesIO(response_bytes(response)))
+        self.assertEqual(archive.namelist(), ["Bursary.xlsx", "Registry.xlsx"])
+        sheet = load_workbook(BytesIO(archive.read("Registry.xlsx"))).active
+        self.assertEqual(sheet.cell(row=2, column=1).value, "Office: Registry | Department: Admin")
+        self.assertEqual(sheet.cell(row=4, column=3).value, "Laptop")
+        self.assertEqual(sheet.cell(row=sheet.max_row, column=1).value, "Exported by: admin")
+
+        response = self.client.get("/api/export/", {"split": "office", "office_id": registry.id})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_staff_export_is_scoped(self):
+        response, sheet = self.export(self.staff_user, office_id=self.office.id)
+        rows = [
+            row for row in sheet.iter_rows(min_row=4, values_only=True) if row[1]
+        ]
+        self.assertEqual([row[2] for row in rows], ["Laptop"])
+
+        self.client.force_authenticate(user=self.staff_user)
+        response = self.client.get("/api/export/")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class InventoryViewSetTest(APITestCase):
+
+    def setUp(self):
+        self.admin_user = CustomUser.objects.create_user(
+            username="admin", password="test123", role="admin"
+        )
+        offices = [Office.objects.create(name=f"Office {index}") for index in range(2)]
+        for index in range(20):
+            InventoryItem.objects.create(
+                user=self.admin_user,
+                office=offices[index % 2],
+                item_id=ItemRegister.objects.create(name=f"Item {index:02}"),
+                quantity=index + 1,
+            )
+        self.client.force_authenticate(user=self.admin_user)
+
+    def test_cursor_pagination(self):
+        ids = []
+        url = "/api/inventory/?pagination=cursor&page_size=6"
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            # One keyset query per page: no COUNT, no per-row lookups of names
+            self.assertFalse(any("COUNT" in query["sql"] for query in queries.captured_queries))
+            self.assertEqual(len(queries), 1)
+            self.assertNotIn("count", response.json())
+            ids.extend(item["id"] for item in response.json()["results"])
+            url = response.json()["next"]
+
+        self.assertEqual(ids, sorted(InventoryItem.objects.values_list("id", flat=True)))
+
+        # Page numbers stay the default
+        response = self.client.get("/api/inventory/", {"page": 2})
+        self.assertEqual(response.json()["count"], 20)
+        self.assertEqual(len(response.json()["results"]), 5)
+
+
+class TemplateViewTest(APITestCase):
+
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        settings_override = override_settings(REPORT_CACHE_DIR=cache_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.office = Office.objects.create(name="Bursary", department="Finance")
+        self.staff_user = CustomUser.objects.create_user(
+            username="staff", password="test123", role="staff"
+        )
+        self.staff_user.assigned_offices.add(self.office)
+        self.items = [ItemRegister.objects.create(name=f"Item {index}") for index in range(3)]
+
+    def download(self, user):
+        self.client.force_authenticate(user=user)
+        response = self.client.get(f"/api/template/{self.office.id}/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.sheet = load_workbook(BytesIO(b"".join(response.streaming_content))).active
+        return response, [row for row in self.sheet.iter_rows(values_only=True) if any(row)]
+
+    def test_template_is_cached_and_signed_per_user(self):
+        response, rows = self.download(self.staff_user)
+        self.assertEqual(response["X-Report-Cache"], "MISS")
+        self.assertEqual(rows[1][0], "Office: Bursary | Description: Finance")
+        self.assertEqual([row[2] for row in rows[3:-1]], ["Item 0", "Item 1", "Item 2"])
+        self.assertEqual(rows[-1][0], "Signature: staff")
+        # Cells carry the report named styles
+        self.assertEqual(self.sheet.cell(row=3, column=1).style, "report_header")
+
+        other = CustomUser.objects.create_user(username="other", password="test123", role="staff")
+        other.assigned_offices.add(self.office)
+        response, rows = self.download(other)
+        self.assertEqual(response["X-Report-Cache"], "HIT")
+        self.assertEqual(rows[-1][0], "Signature: other")
+
+        # Register changes are picked up
+        ItemRegister.objects.create(name="Item 3")
+        response, rows = self.download(other)
+        self.assertEqual(response["X-Report-Cache"], "MISS")
+        self.assertEqual(rows[-2][2], "Item 3")
+
+    def test_rendering_benchmark(self):
+        output = StringIO()
+        call_command("benchmark_reports", rows=50, columns=3, repeat=1, stdout=output)
+        self.assertIn("named styles (write-only)", output.getvalue())
+
+
+class ImportInventoryViewTest(APITestCase):
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.staff_user = CustomUser.objects.create_user(
+            username="staff", password="test123", role="staff"
+        )
+        self.office = Office.objects.create(name="Bursary", department="Finance")
+        self.staff_user.assigned_offices.add(self.office)
+        self.items = [ItemRegister.objects.create(name=f"Item {index}") for index in range(30)]
+        self.client.force_authenticate(user=self.staff_user)
+
+    def template(self, rows):
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(["Test Org"])
+        sheet.append([f"Office: {self.office.name}"])
+        sheet.append(["S/N", "Item ID", "Items", "Qty", "Description (Optional)", "Remarks"])
+        for index, (item, quantity) in enumerate(rows, start=1):
+            sheet.append([index, item.item_id, item.name, quantity, None, "Good"])
+        sheet.append([])
+        sheet.append(["Signature: staff", "Ensure item ID matches the uploaded template."])
+        sheet.merge_cells(
+            start_row=sheet.max_row, start_column=1, end_row=sheet.max_row, end_column=6
+        )
+        output = BytesIO()
+        workbook.save(output)
+        output.seek(0)
+        output.name = "template.xlsx"
+        return output
+
+    def test_import_creates_and_updates(self):
+        response = self.upload([(self.items[0], 3), (self.items[1], 2)])
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()["new_items"], 2)
+
+        response = self.upload([(self.items[0], 5), (self.items[2], 1)])
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()["new_items"], 1)
+        self.assertEqual(response.json()["updated_items"], ["Item 0"])
+        self.assertEqual(
+            dict(InventoryItem.objects.values_list("item_id__name", "quantity")),
+            {"Item 0": 5, "Item 1": 2, "Item 2": 1},
+        )
+        # Bulk writes keep the broadsheet summary in step
+        self.assertEqual(
+            BroadsheetSummary.objects.get(item=self.items[0]).total_quantity, 5
+        )
+
+    def test_import_csv(self):
+        content = "S/N,Item ID,Items,Qty,Description (Optional),Remarks\n"
+        content += f"1,{self.items[0].item_id},Item 0,3,,Good\n"
+        content += f"2,{self.items[1].item_id},Item 1,two,,\n"
+        upload = SimpleUploadedFile("inventory.csv", content.encode("utf-8-sig"), "text/csv")
+        response = self.client.post(
+            f"/api/import/?office_id={self.office.id}", {"file": upload}, format="multipart"
+        )
+        # Same validation as the Excel path, with CSV line numbers
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([error["row"] for error in response.json()["errors"]], [3])
+
+        upload = SimpleUploadedFile("inventory.csv", content.replace("two", "2").encode(), "text/csv")
+        response = self.client.post(
+            f"/api/import/?office_id={self.office.id}", {"file": upload}, format="multipart"
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            dict(InventoryItem.objects.values_list("item_id__name", "quantity")),
+            {"Item 0": 3, "Item 1": 2},
+        )
+
+    def test_identical_reupload_is_not_imported_again(self):
+        content = self.template([(self.items[0], 3), (self.items[1], 2)]).read()
+
+        def upload(content, **params):
+            params["office_id"] = self.office.id
+            return self.client.post(
+                f"/api/import/?{urlencode(params)}",
+                {"file": SimpleUploadedFile("template.xlsx", content)},
+                format="multipart",
+            )
+
+        response = upload(content)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        InventoryItem.objects.filter(item_id=self.items[0]).update(quantity=9)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = upload(content)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.json()["duplicate"])
+        self.assertEqual(response.json()["new_items"], 2)
+        self.assertFalse(any("INSERT" in query["sql"] or "UPDATE" in query["sql"] for query in queries))
+        self.assertEqual(InventoryItem.objects.get(item_id=self.items[0]).quantity, 9)
+
+        # force=true, or a different file, is imported
+        response = upload(content, force="true")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(InventoryItem.objects.get(item_id=self.items[0]).quantity, 3)
+        response = self.upload([(self.items[0], 4)])
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_import_query_count_is_constant(self):
+        self.upload([(item, 1) for item in self.items[:15]])
+
+        def count_queries(rows):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.upload(rows)
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            return len(queries)
+
+        # Same mix of updates and new rows, at two and at fifteen rows each
+        small = count_queries([(item, 2) for item in self.items[:2] + self.items[15:17]])
+        large = count_queries([(item, 3) for item in self.items[:15] + self.items[17:]])
+        self.assertEqual(small, large)
+
+    def upload(self, rows, **params):
+        params["office_id"] = self.office.id
+        return self.client.post(
+            f"/api/import/?{urlencode(params)}",
+            {"file": self.template(rows)},
+            format="multipart",
+        )
+
+    def test_import_reports_every_invalid_row(self):
+        renamed = ItemRegister(name="Renamed", item_id=self.items[2].item_id)
+        response = self.upload(
+            [(self.items[0], 3), (self.items[1], 0), (renamed, "two"), (self.items[3], 1)]
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            [(error["row"], error["error"].split()[0]) for error in response.json()["errors"]],
+            [(5, "Invalid"), (6, "Item"), (6, "Invalid")],
+        )
+        self.assertFalse(InventoryItem.objects.exists())
+
+    def test_import_dry_run(self):
+        self.upload([(self.items[0], 3)])
+        response = self.upload([(self.items[0], 5), (self.items[1], 1)], dry_run="true")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["new_items"], 1)
+        self.assertEqual(response.json()["updated_items"], ["Item 0"])
+        self.assertEqual(
+            dict(InventoryItem.objects.values_list("item_id__name", "quantity")), {"Item 0": 3}
+        )
+
+    def test_import_limits(self):
+        rows = [(self.items[0], 3), (self.items[1], 2), (self.items[2], 1)]
+        with override_settings(IMPORT_MAX_UPLOAD_BYTES=1024):
+            response = self.upload(rows)
+        self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+        with override_settings(IMPORT_MAX_ROWS=2):
+            response = self.upload(rows)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("Too many rows", response.json()["error"])
+
+        with override_settings(IMPORT_MAX_UNPACKED_BYTES=1024):
+            response = self.upload(rows)
+        self.assertEqual(response.json()["error"], "The workbook is too large to import.")
+        self.assertFalse(InventoryItem.objects.exists())
+
+        # Uploads Django spooled to disk are parsed from their temporary file
+        with override_settings(FILE_UPLOAD_MAX_MEMORY_SIZE=0):
+            response = self.upload(rows)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(InventoryItem.objects.count(), 3)
+
+    def test_background_import_job(self):
+        response = self.upload([(self.items[0], 3), (self.items[1], 2)], **{"async": "true"})
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        status_url = response.json()["status_url"]
+        self.assertFalse(InventoryItem.objects.exists())
+        self.assertEqual(self.client.get(status_url).json()["status"], "pending")
+
+        call_command("process_import_jobs", "--once", stdout=StringIO())
+        job = self.client.get(status_url).json()
+        self.assertEqual(job["status"], "succeeded")
+        self.assertEqual(job["result"]["new_items"], 2)
+        self.assertEqual(InventoryItem.objects.count(), 2)
+
+        # Failed jobs carry every row error; other users cannot see the job
+        response = self.upload([(self.items[0], 0)], **{"async": "true"})
+        call_command("process_import_jobs", "--once", stdout=StringIO())
+        job = self.client.get(response.json()["status_url"]).json()
+        self.assertEqual(job["status"], "failed")
+        self.assertEqual(job["errors"][0]["row"], 4)
+
+        other = CustomUser.objects.create_user(username="other", password="test123", role="staff")
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.client.get(status_url).status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(IMPORT_JOB_TIMEOUT=60, IMPORT_JOB_MAX_ATTEMPTS=2)
+    def test_stale_import_job_is_reclaimed(self):
+        self.upload([(self.items[0], 3)], **{"async": "true"})
+        job = ImportJob.objects.get()
+        stale = timezone.now() - timedelta(minutes=5)
+
+        # A job its worker died on is requeued and processed again
+        ImportJob.objects.filter(pk=job.pk).update(
+            status=ImportJob.RUNNING, started_at=stale, attempts=1
+        )
+        call_command("process_import_jobs", "--once", stdout=StringIO())
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportJob.SUCCEEDED)
+        self.assertEqual(job.attempts, 2)
+        self.assertEqual(InventoryItem.objects.count(), 1)
+
+        # Recent running jobs are left alone; jobs out of attempts are failed
+        self.upload([(self.items[1], 2)], **{"async": "true"})
+        job = ImportJob.objects.latest("id")
+        ImportJob.objects.filter(pk=job.pk).update(
+            status=ImportJob.RUNNING, started_at=timezone.now(), attempts=2
+        )
+        call_command("process_import_jobs", "--once", stdout=StringIO())
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportJob.RUNNING)
+
+        ImportJob.objects.filter(pk=job.pk).update(started_at=stale)
+        call_command("process_import_jobs", "--once", stdout=StringIO())
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportJob.FAILED)
+        self.assertIn("interrupted", job.errors[0])
+        self.assertEqual(InventoryItem.objects.count(), 1)
+
+
+    @override_settings(REPORT_WORKERS=1)
+    def test_multi_office_import(self):
+        registry = Office.objects.create(name="Registry")
+        workbook = Workbook()
+        workbook.remove(workbook.active)
+        for office, rows in [
+            (self.office, [(self.items[0], 3), (self.items[1], 2)]),
+            (registry, [(self.items[0], 7)]),
+        ]:
+            sheet = workbook.create_sheet(office.name)
+            sheet.append(["Test Org"])
+            sheet.append([f"Office: {office.name} | Description: {office.department or 'No Description'}"])
+            sheet.append(["S/N", "Item ID", "Items", "Qty", "Description (Optional)", "Remarks"])
+            for index, (item, quantity) in enumerate(rows, start=1):
+                sheet.append([index, item.item_id, item.name, quantity, None, "Good"])
+        output = BytesIO()
+        workbook.save(output)
+        upload = SimpleUploadedFile("offices.xlsx", output.getvalue())
+
+        # Admins only
+        response = self.client.post("/api/import/offices/", {"file": upload}, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        admin = CustomUser.objects.create_user(username="admin", password="test123", role="admin")
+        self.client.force_authenticate(user=admin)
+        upload.seek(0)
+        response = self.client.post("/api/import/offices/", {"file": upload}, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()["offices"], {"Bursary": 2, "Registry": 1})
+        self.assertEqual(
+            sorted(InventoryItem.objects.values_list("office__name", "item_id__name", "quantity")),
+            [("Bursary", "Item 0", 3), ("Bursary", "Item 1", 2), ("Registry", "Item 0", 7)],
+        )
+
+        # Errors name the sheet; nothing is written when any sheet is invalid
+        sheet = workbook["Registry"]
+        sheet["D4"] = 0
+        sheet["A2"] = "Office: Nowhere | Description: No Description"
+        workbook["Bursary"]["D5"] = 0
+        output = BytesIO()
+        workbook.save(output)
+        upload = SimpleUploadedFile("offices.xlsx", output.getvalue())
+        response = self.client.post("/api/import/offices/", {"file": upload}, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            [(error["sheet"], error["row"]) for error in response.json()["errors"]],
+            [("Bursary", 5), ("Registry", 2)],
+        )
+        self.assertEqual(InventoryItem.objects.get(office=registry).quantity, 7)
+
+@override_settings(REPORT_WORKERS=2)
+class ParallelWorkerTest(APITransactionTestCase):
+    """
+    Runs the report worker pool for real: committed data, worker processes set up with
+    `django.setup`, and tasks and results pickled across processes.
+    """
+
+    def setUp(self):
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            self.skipTest("Worker processes cannot share an in-memory test database.")
+        self.admin_user = CustomUser.objects.create_user(
+            username="admin", password="test123", role="admin"
+        )
+        self.offices = [
+            Office.objects.create(name=name, department="Finance")
+            for name in ("Bursary", "Registry", "Works")
+        ]
+        self.items = [ItemRegister.objects.create(name=f"Item {index}") for index in range(3)]
+        self.client.force_authenticate(user=self.admin_user)
+
+    def test_export_split_by_office_in_workers(self):
+        for quantity, office in enumerate(self.offices, start=1):
+            for item in self.items[:quantity]:
+                InventoryItem.objects.create(
+                    user=self.admin_user, office=office, item_id=item, quantity=quantity
+                )
+
+        response = self.client.get("/api/export/", {"split": "office"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        archive = zipfile.ZipFile(BytesIO(response_bytes(response)))
+        self.assertEqual(archive.namelist(), ["Bursary.xlsx", "Registry.xlsx", "Works.xlsx"])
+        for quantity, office in enumerate(self.offices, start=1):
+            sheet = load_workbook(BytesIO(archive.read(f"{office.name}.xlsx"))).active
+            self.assertEqual(sheet.cell(row=2, column=1).value, f"Office: {office.name} | Department: Finance")
+            rows = [row for row in sheet.iter_rows(min_row=4, values_only=True) if row[1]]
+            self.assertEqual(
+                [(row[2], row[3]) for row in rows],
+                [(item.name, quantity) for item in self.items[:quantity]],
+            )
+            self.assertEqual(sheet.cell(row=sheet.max_row, column=1).value, "Exported by: admin")
+
+        # The request's own connection still works after the pool closed it
+        self.assertEqual(InventoryItem.objects.count(), 6)
+
+    def test_multi_office_import_in_workers(self):
+        workbook = Workbook()
+        workbook.remove(workbook.active)
+        for quantity, office in enumerate(self.offices, start=1):
+            sheet = workbook.create_sheet(office.name)
+            sheet.append(["Test Org"])
+            sheet.append([f"Office: {office.name} | Description: Finance"])
+            sheet.append(["S/N", "Item ID", "Items", "Qty", "Description (Optional)", "Remarks"])
+            for index, item in enumerate(self.items, start=1):
+                sheet.append([index, item.item_id, item.name, quantity, None, "Good"])
+        workbook["Works"]["D5"] = 0
+        workbook.create_sheet("Notes").append(["Collected by the admin office"])
+
+        def run_import(workers, **kwargs):
+            output = BytesIO()
+            workbook.save(output)
+            upload = SimpleUploadedFile("offices.xlsx", output.getvalue())
+            with override_settings(REPORT_WORKERS=workers):
+                try:
+                    created, _, offices = import_office_workbook(upload, self.admin_user, **kwargs)
+                except InventoryImportError as exc:
+                    return exc.detail["errors"]
+            return offices, [(row.office.name, row.item_id.name, row.quantity) for row in created]
+
+        # Workers report the same errors, in sheet order, as the serial path
+        errors = run_import(3)
+        self.assertEqual(errors, run_import(1))
+        self.assertEqual(
+            [(error["sheet"], error["row"]) for error in errors], [("Works", 5), ("Notes", 2)]
+        )
+
+        workbook.remove(workbook["Notes"])
+        workbook["Works"]["D5"] = 3
+        result = run_import(3, dry_run=True)
+        self.assertEqual(result, run_import(1, dry_run=True))
+        self.assertEqual(run_import(3), result)
+        self.assertEqual(result[0], {"Bursary": 3, "Registry": 3, "Works": 3})
+        self.assertEqual(
+            sorted(InventoryItem.objects.values_list("office__name", "item_id__name", "quantity")),
+            sorted(result[1]),
+        )
+
+
+class RegisterImportViewTest(APITestCase):
+
+    def setUp(self):
+        self.admin_user = CustomUser.objects.create_user(
+            username="admin", password="test123", role="admin"
+        )
+        self.chair = ItemRegister.objects.create(name="Chair", description="Old")
+        self.client.force_authenticate(user=self.admin_user)
+
+    def upload(self, rows):
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(["Test Org"])
+        sheet.append(["Item Register"])
+        sheet.append(["S/N", "Name", "Description"])
+        for index, (name, description) in enumerate(rows, start=1):
+            sheet.append([index, name, description])
+        output = BytesIO()
+        workbook.save(output)
+        output.seek(0)
+        output.name = "register.xlsx"
+        return self.client.post("/api/register/import/", {"file": output}, format="multipart")
+
+    def test_register_import_upserts(self):
+        response = self.upload([("Laptop", "Work laptop"), (" Chair ", "Office chair"), ("Desk", None)])
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(sorted(response.json()["created_items"]), ["Desk", "Laptop"])
+        self.assertEqual(response.json()["updated_items"], ["Chair"])
+
+        self.chair.refresh_from_db()
+        self.assertEqual(self.chair.description, "Office chair")
+        item_ids = list(ItemRegister.objects.values_list("item_id", flat=True))
+        self.assertEqual(len(set(item_ids)), 3)
+        self.assertTrue(all(item_id.startswith("OLASS-") for item_id in item_ids))
+
+        # Rows without a name are reported, the others still imported
+        response = self.upload([(None, "Nameless"), ("Lamp", None)])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json()["errors"], ["Row 4: Name is required."])
+        self.assertTrue(ItemRegister.objects.filter(name="Lamp").exists())
+
+    def test_register_import_csv(self):
+        upload = SimpleUploadedFile(
+            "register.csv", b"S/N,Name,Description\n1,Laptop,Work laptop\n2,Chair,\n"
+        )
+        response = self.client.post("/api/register/import/", {"file": upload}, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()["created_items"], ["Laptop"])
+        self.assertEqual(
+            ItemRegister.objects.get(name="Laptop").description, "Work laptop"
+        )
+
+    def test_register_import_query_count_is_constant(self):
+        def count_queries(rows):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.upload(rows)
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            return len(queries)
+
+        small = count_queries([("Chair", "New")] + [(f"Item {i}", None) for i in range(3)])
+        large = count_queries([("Chair", "Newer")] + [(f"Other {i}", None) for i in range(100)])
+        self.assertEqual(small, large)
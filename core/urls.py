@@ -10,8 +10,12 @@ from .views import (
     InventoryViewSet,
     TemplateView,
     ImportInventoryView,
+    MultiOfficeImportView,
+    ImportJobView,
     ExportInventoryView,
-    BroadsheetView
+    InventoryDeltaView,
+    BroadsheetView,
+    BroadsheetWindowView,
 )
 
 router = DefaultRouter()
@@ -27,7 +31,11 @@ urlpatterns = router.urls + [
     # Inventory Template URLs
     path('template/<int:office_id>/', TemplateView.as_view(), name='download-template'),
     path('import/', ImportInventoryView.as_view(), name='import-inventory'),
+    path('import/offices/', MultiOfficeImportView.as_view(), name='import-inventory-offices'),
+    path('import-jobs/<int:job_id>/', ImportJobView.as_view(), name='import-job'),
     path('export/', ExportInventoryView.as_view(), name='export-inventory'),
+    path('export/delta/', InventoryDeltaView.as_view(), name='export-inventory-delta'),
     # Inventory Broadsheet URLs
     path('broadsheet/', BroadsheetView.as_view(), name='broadsheet'),
+    path('broadsheet/window/', BroadsheetWindowView.as_view(), name='broadsheet-window'),
 ]
@@ -6,24 +6,75 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.exceptions import NotFound
 from rest_framework.views import APIView
-from openpyxl import Workbook
-from openpyxl.styles import Alignment, Font
-from openpyxl.utils import get_column_letter
-from openpyxl.utils import get_column_letter
-from django.http import HttpResponse
+from django.http import FileResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 from rest_framework.parsers import MultiPartParser, FormParser
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.negotiation import DefaultContentNegotiation
+import base64
+import binascii
 import csv
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
 from io import StringIO
-from openpyxl import load_workbook
+from django.conf import settings
 from django.shortcuts import get_object_or_404
-from django.db.models import Sum, Avg, Count
-from datetime import date
-from .models import Office, ItemRegister, InventoryItem
+from django.urls import reverse
+from django.db.models import Sum, Avg, Count, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.text import get_valid_filename
+from datetime import date, timedelta
+from .models import (
+    Office,
+    ItemRegister,
+    ImportJob,
+    InventoryItem,
+    InventoryTombstone,
+    BroadsheetSummary,
+)
+from .broadsheet import (
+    BroadsheetPivot,
+    ComparativePivot,
+    broadsheet_layout,
+    broadsheet_valuation,
+    broadsheet_version,
+    money,
+    value_expression,
+    write_broadsheet,
+    write_comparative_broadsheet,
+    year_changes,
+)
+from .cache import inventory_version, register_version, report_cache
+from .excel import (
+    patch_placeholder,
+    streaming_xlsx_response,
+    xlsx_chunks_response,
+    xlsx_file_response,
+)
+from .imports import (
+    InventoryImportError,
+    check_upload_size,
+    find_processed_import,
+    import_inventory,
+    import_office_workbook,
+    import_register,
+    record_processed_import,
+    upload_digest,
+)
+from .parallel import run_in_pool
+from .reports import ReportLayout
+from .streaming import TABULAR_FORMATS, streaming_csv_response, tabular_response
+from .summary import batched_summary_refresh
 from .serializers import (
     OfficeSerializer,
     ItemRegisterSerializer,
     InventoryItemSerializer,
+    ImportJobSerializer,
 )
 from accounts.permissions import (
     IsAdminOrStaffOrReadOnly,
@@ -33,11 +84,86 @@ from accounts.permissions import (
     IsAssignedStaffOrReadOnly,
 )
 
+class ReportContentNegotiation(DefaultContentNegotiation):
+    """
+    Lets report views use `?format=` for their own output formats (csv, xlsx, ...).
+    Formats without a matching renderer fall back to normal negotiation instead of a 404.
+    """
+
+    def filter_renderers(self, renderers, format):
+        return [renderer for renderer in renderers if renderer.format == format] or renderers
+
+def query_flag(request, name):
+    """
+    Read a boolean query parameter (`true`/`1`).
+    """
+    return request.query_params.get(name, "").lower() in ("true", "1")
+
+def queue_import_job(request, kind, file_obj, office=None, options=None):
+    """
+    Spool an upload to disk as a pending ImportJob for the background worker and answer
+    202 with the URL to poll.
+    """
+    job = ImportJob.objects.create(
+        kind=kind, user=request.user, office=office, file=file_obj, options=options or {}
+    )
+    return Response(
+        {
+            "message": "Import queued.",
+            "job_id": job.id,
+            "status_url": reverse("import-job", args=[job.id]),
+        },
+        status=202,
+    )
+
+def duplicate_import_response(request, kind, content_hash, office=None):
+    """
+    Answer an identical re-upload (same file and scope) with the result of its earlier
+    import, without parsing or writing anything. `force=true` imports it again.
+    """
+    if query_flag(request, "force"):
+        return None
+    previous = find_processed_import(kind, content_hash, request.user, office)
+    if previous is None:
+        return None
+    return Response(
+        {
+            **previous.result,
+            "message": "This file was already imported, nothing was changed. "
+            "Upload it with force=true to import it again.",
+            "duplicate": True,
+            "imported_at": previous.imported_at,
+        },
+        status=200,
+    )
+
+def oversized_upload_response(file_obj):
+    """
+    413 response for an upload over `IMPORT_MAX_UPLOAD_BYTES`, before it is hashed or parsed.
+    """
+    try:
+        check_upload_size(file_obj)
+    except InventoryImportError as exc:
+        return Response(exc.detail, status=413)
+    return None
+
 class InventoryPagination(PageNumberPagination):
     page_size = 15  # Number of items per page
     page_size_query_param = "page_size"  # Allow client to specify page size
     max_page_size = 100  # Limit the maximum size to prevent abuse
 
+class InventoryCursorPagination(CursorPagination):
+    """
+    Keyset pagination over the primary key, selected with `pagination=cursor`.
+
+    Pages are fetched with `WHERE id > <cursor> ORDER BY id` through the primary key index,
+    without a COUNT query or an OFFSET scan, so deep pages cost the same as the first.
+    """
+    page_size = 15
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = ("id",)
+
 # --- Office ViewSet ---
 class OfficeViewSet(ModelViewSet):
     queryset = Office.objects.all()
@@ -74,6 +200,11 @@ class OfficeViewSet(ModelViewSet):
         response.data["message"] = "Office updated successfully."
         return response
 
+    def perform_destroy(self, instance):
+        # The office's inventory rows are deleted with it; refresh their summary once
+        with batched_summary_refresh():
+            instance.delete()
+
     def destroy(self, request, *args, **kwargs):
         office = self.get_object()
         super().destroy(request, *args, **kwargs)
@@ -157,55 +288,37 @@ class RegisterTemplateView(APIView):
     """
 
     permission_classes = [IsAuthenticated, IsAdminOrSuperAdmin]
+    layout = ReportLayout(
+        ["S/N", "Name", "Description"], title_styles=("report_title", "report_subtitle")
+    )
 
     def get(self, request):
-        # Create a workbook and sheet
-        workbook = Workbook()
-        sheet = workbook.active
-        sheet.title = "Item Register Template"
-
-        # Add organization name and header
         organization_name = (
             request.user.organization.name
             if request.user.organization
             else "Unknown Organization"
         )
         current_year = date.today().year  # Get the current year
-        header_font = Font(bold=True, size=14)
-        centered_alignment = Alignment(horizontal="center", vertical="center")
-
-        # Organization Name
-        sheet.merge_cells(start_row=1, start_column=1, end_row=1, end_column=3)
-        org_cell = sheet.cell(row=1, column=1)
-        org_cell.value = organization_name
-        org_cell.font = Font(bold=True, size=14)
-        org_cell.alignment = centered_alignment
-
-        # Subheading: Year
-        sheet.merge_cells(start_row=2, start_column=1, end_row=2, end_column=3)
-        year_cell = sheet.cell(row=2, column=1)
-        year_cell.value = f"Item Register Template - Year {current_year}"
-        year_cell.font = Font(bold=True, italic=True, size=12)
-        year_cell.alignment = centered_alignment
-
-        # Column headers
-        headers = ["S/N", "Name", "Description"]
-        for col_num, header in enumerate(headers, start=1):
-            cell = sheet.cell(row=3, column=col_num)
-            cell.value = header
-            cell.font = Font(bold=True)
-            cell.alignment = Alignment(horizontal="center")
 
-        # Prepare response
-        response = HttpResponse(
-            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        # The template only depends on the organization and year, so it is rendered once
+        cached_file, cache_status = report_cache.open_or_render(
+            "template",
+            "register",
+            (organization_name, current_year),
+            lambda output: self.render_template(output, organization_name, current_year),
         )
-        response["Content-Disposition"] = (
-            "attachment; filename=item_Register_template.xlsx"
-        )
-        workbook.save(response)
+        response = xlsx_file_response(cached_file, "item_Register_template.xlsx")
+        response["X-Report-Cache"] = cache_status
         return response
 
+    def render_template(self, output, organization_name, current_year):
+        self.layout.render(
+            output,
+            "Item Register Template",
+            [organization_name, f"Item Register Template - Year {current_year}"],
+            rows=[],
+        )
+
 class RegisterImportView(APIView):
     """
     Endpoint to upload an Excel template and register items in the Register.
@@ -219,54 +332,24 @@ class RegisterImportView(APIView):
         if not file_obj:
             return Response({"error": "No file uploaded."}, status=400)
 
-        try:
-            # Load the workbook and sheet
-            workbook = load_workbook(file_obj)
-            sheet = workbook.active
-        except Exception as e:
-            return Response({"error": "Invalid Excel file format."}, status=400)
-
-        # Validate headers
-        expected_headers = ["S/N", "Name", "Description"]
-        actual_headers = [cell.value for cell in sheet[3]]
-        if actual_headers[: len(expected_headers)] != expected_headers:
-            return Response(
-                {"error": "Invalid template format. Please use the correct template."},
-                status=400,
-            )
+        oversized = oversized_upload_response(file_obj)
+        if oversized:
+            return oversized
 
-        # Process rows
-        created_items = []
-        updated_items = []
-        errors = []
-        for i, row in enumerate(sheet.iter_rows(min_row=4, values_only=True), start=4):
-            serial_number, name, description = row
+        content_hash = upload_digest(file_obj)
+        duplicate = duplicate_import_response(request, ImportJob.REGISTER, content_hash)
+        if duplicate:
+            return duplicate
 
-            # Validate row data
-            if not name:
-                errors.append(f"Row {i}: Name is required.")
-                continue
+        if query_flag(request, "async"):
+            return queue_import_job(
+                request, ImportJob.REGISTER, file_obj, options={"content_hash": content_hash}
+            )
 
-            # Create or update item
-            try:
-                item, created = ItemRegister.objects.get_or_create(
-                    name=name.strip(),
-                    defaults={
-                        "description": description.strip() if description else None
-                    },
-                )
-                if created:
-                    created_items.append(item.name)
-                else:
-                    # Update the description if provided
-                    if description:
-                        item.description = description.strip()
-                        item.save()
-                    updated_items.append(item.name)
-            except Exception as e:
-                errors.append(
-                    f"Row {i}: Error processing item '{name}'. Details: {str(e)}"
-                )
+        try:
+            created_items, updated_items, errors = import_register(file_obj)
+        except InventoryImportError as exc:
+            return Response(exc.detail, status=400)
 
         # Prepare response
         response_data = {
@@ -276,73 +359,94 @@ class RegisterImportView(APIView):
         }
         if errors:
             response_data["errors"] = errors
+        else:
+            record_processed_import(
+                ImportJob.REGISTER, content_hash, request.user, response_data
+            )
 
         return Response(response_data, status=201 if not errors else 400)
 
 class RegisterDownloadView(APIView):
     """
-    Endpoint to download the item Register as an Excel file.
+    Endpoint to download the item Register as an Excel file, or as CSV/NDJSON/Parquet
+    with `?format=`.
     """
 
     permission_classes = [IsAuthenticated]
+    content_negotiation_class = ReportContentNegotiation
+    formats = ("xlsx",) + TABULAR_FORMATS
+    layout = ReportLayout(
+        ["S/N", "Item ID", "Name", "Description"],
+        title_styles=("report_title", "report_subtitle"),
+        write_only=True,
+    )
+
+    # Columns of the machine-readable formats: (name, pandas dtype, register field)
+    tabular_columns = [
+        ("item_id", "string", "item_id"),
+        ("name", "string", "name"),
+        ("description", "string", "description"),
+        ("unit_cost", "float64", "unit_cost"),
+        ("created_at", "datetime64[ns, UTC]", "created_at"),
+        ("updated_at", "datetime64[ns, UTC]", "updated_at"),
+    ]
 
     def get(self, request):
-        # Create a workbook and sheet
-        workbook = Workbook()
-        sheet = workbook.active
-        sheet.title = "Item Register"
+        output_format = request.query_params.get("format", "xlsx")
+        if output_format not in self.formats:
+            return Response(
+                {"error": f"Unsupported format. Choose one of: {', '.join(self.formats)}."},
+                status=400,
+            )
+        if output_format != "xlsx":
+            return self.generate_tabular(output_format)
 
-        # Add organization name and header
         organization_name = (
             request.user.organization.name
             if request.user.organization
             else "Unknown Organization"
         )
         current_year = date.today().year  # Get the current year
-        header_font = Font(bold=True, size=14)
-        centered_alignment = Alignment(horizontal="center", vertical="center")
-
-        # Organization Name
-        sheet.merge_cells(start_row=1, start_column=1, end_row=1, end_column=4)
-        org_cell = sheet.cell(row=1, column=1)
-        org_cell.value = organization_name
-        org_cell.font = header_font
-        org_cell.alignment = centered_alignment
-
-        # Subheading: Year
-        sheet.merge_cells(start_row=2, start_column=1, end_row=2, end_column=4)
-        year_cell = sheet.cell(row=2, column=1)
-        year_cell.value = f"Item Register - Year {current_year}"
-        year_cell.font = Font(bold=True, italic=True, size=12)
-        year_cell.alignment = centered_alignment
-
-        # Column headers
-        headers = ["S/N", "Item ID", "Name", "Description"]
-        for col_num, header in enumerate(headers, start=1):
-            cell = sheet.cell(row=3, column=col_num)
-            cell.value = header
-            cell.font = Font(bold=True)
-            cell.alignment = Alignment(horizontal="center")
-
-        # Fetch item Register data and populate the sheet
-        item_Register = ItemRegister.objects.all()
-        for idx, item in enumerate(item_Register, start=1):
-            sheet.append(
-                [
-                    idx,  # S/N
-                    item.item_id,  # item ID
-                    item.name,  # Name
-                    item.description or "N/A",  # Description
-                ]
+        return streaming_xlsx_response(
+            lambda output: self.render_excel(output, organization_name, current_year),
+            "item_Register.xlsx",
+        )
+
+    def render_excel(self, output, organization_name, current_year):
+        # Fetch item Register data in chunks and stream it into the sheet
+        rows = (
+            [idx, item_id, name, description or "N/A"]  # S/N, item ID, Name, Description
+            for idx, (item_id, name, description) in enumerate(
+                ItemRegister.objects.values_list("item_id", "name", "description")
+                .order_by("id")
+                .iterator(chunk_size=2000),
+                start=1,
             )
+        )
+        self.layout.render(
+            output,
+            "Item Register",
+            [organization_name, f"Item Register - Year {current_year}"],
+            rows,
+        )
 
-        # Prepare the response
-        response = HttpResponse(
-            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    def generate_tabular(self, output_format):
+        """
+        Stream the Register as CSV, NDJSON or Parquet, reading it in chunks.
+        """
+        rows = (
+            ItemRegister.objects.values_list(*(field for _, _, field in self.tabular_columns))
+            .order_by("id")
+            .iterator(chunk_size=2000)
         )
-        response["Content-Disposition"] = "attachment; filename=item_Register.xlsx"
-        workbook.save(response)
-        return response
+        columns = [(name, dtype) for name, dtype, _ in self.tabular_columns]
+        try:
+            return tabular_response(output_format, columns, rows, "item_Register")
+        except ImportError:
+            return Response(
+                {"error": "Parquet export requires pyarrow, which is not installed."},
+                status=501,
+            )
 
 # --- Inventory ViewSet ---
 class InventoryViewSet(ModelViewSet):
@@ -351,6 +455,24 @@ class InventoryViewSet(ModelViewSet):
     permission_classes = [IsAuthenticated, IsAdminOrSuperAdmin | IsAssignedStaffOrReadOnly]
     pagination_class = InventoryPagination
 
+    @property
+    def paginator(self):
+        """
+        Page numbers by default; `pagination=cursor` (or a `cursor` from a previous page)
+        switches to keyset pagination.
+        """
+        if not hasattr(self, "_paginator"):
+            params = self.request.query_params if self.request else {}
+            use_cursor = params.get("pagination") == "cursor" or "cursor" in params
+            self._paginator = (
+                InventoryCursorPagination() if use_cursor else self.pagination_class()
+            )
+        return self._paginator
+
+    def filter_queryset(self, queryset):
+        # The serializer reads the item and office names; fetch them with the rows
+        return super().filter_queryset(queryset).select_related("item_id", "office")
+
     def get_queryset(self):
         """
         Restrict queryset based on user's role and assigned offices.
@@ -426,8 +548,14 @@ class InventoryViewSet(ModelViewSet):
 
 
 # --- Template View ---
+SIGNATURE_PLACEHOLDER = "__SIGNATURE__"
+
 class TemplateView(APIView):
     permission_classes = [IsAuthenticated, IsAssignedStaff]
+    layout = ReportLayout(
+        ["S/N", "Item ID", "Items", "Qty", "Description (Optional)", "Remarks"],
+        column_widths=[10, 20, 30, 10, 40, 30],
+    )
 
     def get(self, request, office_id):
         office = get_object_or_404(Office, id=office_id)
@@ -442,83 +570,43 @@ class TemplateView(APIView):
                 status=403,
             )
 
-        # Fetch all items from the ItemRegister
-        items = ItemRegister.objects.all()
-
-        # Create workbook and sheet
-        workbook = Workbook()
-        sheet = workbook.active
-        sheet.title = f"Template for {office.name}"
-
-        # Header Font and Alignment
-        header_font = Font(bold=True, size=14)
-        centered_alignment = Alignment(horizontal="center", vertical="center")
-
-        # Organization Name Header
         organization_name = (
             request.user.organization.name
             if request.user.organization
             else "Unknown Organization"
         )
-        sheet.merge_cells(start_row=1, start_column=1, end_row=1, end_column=6)
-        sheet.cell(row=1, column=1).value = organization_name
-        sheet.cell(row=1, column=1).font = header_font
-        sheet.cell(row=1, column=1).alignment = centered_alignment
-
-        # Office Description Header
-        sheet.merge_cells(start_row=2, start_column=1, end_row=2, end_column=6)
-        office_description = f"Office: {office.name} | Description: {office.department or 'No Description'}"
-        sheet.cell(row=2, column=1).value = office_description
-        sheet.cell(row=2, column=1).font = header_font
-        sheet.cell(row=2, column=1).alignment = centered_alignment
-
-        # Column Headers
-        headers = [
-            "S/N",
-            "Item ID",
-            "Items",
-            "Qty",
-            "Description (Optional)",
-            "Remarks",
-        ]
-        for col_num, header in enumerate(headers, start=1):
-            cell = sheet.cell(row=3, column=col_num)
-            cell.value = header
-            cell.font = Font(bold=True)
-            cell.alignment = Alignment(horizontal="center", vertical="center")
-
-        # Populate rows with items from ItemRegister, including the description
-        for idx, item in enumerate(items, start=1):
-            sheet.append([idx, item.item_id, item.name, "", item.description, ""])
 
-        # Footer for Staff Name
-        staff_name = request.user.username
-        sheet.append([])  # Leave a blank row
-        sheet.append(
-            [
-                f"Signature: {staff_name}",
-                "Ensure item ID matches the uploaded template.",
-            ]
+        # Templates are rendered once per office, organization and Register version and
+        # shared; only the signature differs per user and is patched into the cached copy
+        key = (organization_name, office.id, office.name, office.department, register_version())
+        cached_file, cache_status = report_cache.open_or_render(
+            "template",
+            office.id,
+            key,
+            lambda output: self.render_template(output, office, organization_name),
         )
-        sheet.merge_cells(
-            start_row=sheet.max_row, start_column=1, end_row=sheet.max_row, end_column=6
-        )
-        sheet.cell(row=sheet.max_row, column=1).alignment = centered_alignment
-
-        # Adjust column widths
-        column_widths = [10, 20, 30, 10, 40, 30]
-        for col_num, width in enumerate(column_widths, start=1):
-            sheet.column_dimensions[chr(64 + col_num)].width = width
+        output = patch_placeholder(cached_file, SIGNATURE_PLACEHOLDER, request.user.username)
+        response = xlsx_chunks_response(output, f"{office.name}_template.xlsx")
+        response["X-Report-Cache"] = cache_status
+        return response
 
-        # Prepare the response
-        response = HttpResponse(
-            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
-        response["Content-Disposition"] = (
-            f"attachment; filename={office.name}_template.xlsx"
+    def render_template(self, output, office, organization_name):
+        # Populate rows with items from ItemRegister, including the description
+        items = ItemRegister.objects.values_list("item_id", "name", "description")
+        self.layout.render(
+            output,
+            f"Template for {office.name}",
+            [
+                organization_name,
+                f"Office: {office.name} | Description: {office.department or 'No Description'}",
+            ],
+            (
+                [idx, item_id, name, "", description, ""]
+                for idx, (item_id, name, description) in enumerate(items, start=1)
+            ),
+            # Footer for Staff Name, patched in per download
+            footer=f"Signature: {SIGNATURE_PLACEHOLDER}",
         )
-        workbook.save(response)
-        return response
 
 # --- Import Inventory View ---
 class ImportInventoryView(APIView):
@@ -546,132 +634,225 @@ class ImportInventoryView(APIView):
                 status=403,
             )
 
-        workbook = load_workbook(file_obj)
-        sheet = workbook.active
-        if not office_id:
-            return Response({"error": "Office ID is required."}, status=400)
+        oversized = oversized_upload_response(file_obj)
+        if oversized:
+            return oversized
 
-        office = get_object_or_404(Office, id=office_id)
-        if office not in request.user.assigned_offices.all():
-            return Response(
-                {"error": "You do not have permission to manage this office."},
-                status=403,
+        # dry_run=true validates the whole file and reports what would change, writing nothing
+        dry_run = query_flag(request, "dry_run")
+        content_hash = upload_digest(file_obj)
+        if not dry_run:
+            duplicate = duplicate_import_response(
+                request, ImportJob.INVENTORY, content_hash, office
+            )
+            if duplicate:
+                return duplicate
+
+        if query_flag(request, "async"):
+            return queue_import_job(
+                request,
+                ImportJob.INVENTORY,
+                file_obj,
+                office,
+                {"dry_run": dry_run, "content_hash": content_hash},
             )
 
-        workbook = load_workbook(file_obj)
-        sheet = workbook.active
+        try:
+            imported_items, updated_items = import_inventory(
+                file_obj, request.user, office, dry_run=dry_run
+            )
+        except InventoryImportError as exc:
+            return Response(exc.detail, status=400)
 
-        # Validate headers
-        expected_headers = [
-            "S/N",
-            "Item ID",
-            "Items",
-            "Qty",
-            "Description (Optional)",
-            "Remarks",
-        ]
-        actual_headers = [
-            str(cell.value).strip() for cell in sheet[3]
-        ]  # Normalize headers
-        if actual_headers != expected_headers:
+        if dry_run:
             return Response(
                 {
-                    "error": "Invalid template format. Please use the correct template.",
-                    "expected_headers": expected_headers,
-                    "actual_headers": actual_headers,  # Include actual headers for debugging
+                    "message": "Template is valid. Nothing was imported (dry run).",
+                    "dry_run": True,
+                    "new_items": len(imported_items),
+                    "updated_items": [item.item_id.name for item in updated_items],
                 },
-                status=400,
+                status=200,
             )
 
-        # Process rows, starting from row 4
-        imported_items = []
-        updated_items = []
-        for i, row in enumerate(
-            sheet.iter_rows(min_row=4, max_row=sheet.max_row, values_only=True)
-        ):
-            serial_number, item_id, item_name, quantity, description, remarks = row
+        result = {
+            "message": "Inventory imported successfully.",
+            "new_items": len(imported_items),
+            "updated_items": [item.item_id.name for item in updated_items],
+        }
+        record_processed_import(
+            ImportJob.INVENTORY, content_hash, request.user, result, office
+        )
+        return Response(result, status=201)
 
-            # Skip rows where item_id is empty (such as empty or signature rows)
-            if not item_id:
-                continue
+class MultiOfficeImportView(APIView):
+    """
+    Endpoint for admins to import one workbook holding a template sheet per office.
+    Each sheet is matched to its office by the header line in row 2.
+    """
 
-            # Validate item ID
-            item = ItemRegister.objects.filter(item_id=item_id).first()
-            if not item:
-                return Response(
-                    {"error": f"Invalid item ID '{item_id}' in row {i + 4}."},
-                    status=400,
-                )
+    permission_classes = [IsAuthenticated, IsAdminOrSuperAdmin]
 
-            # Ensure item ID matches item name
-            if item.name != item_name:
-                return Response(
-                    {
-                        "error": f"Item name '{item_name}' does not match item ID '{item_id}' in row {i + 4}."
-                    },
-                    status=400,
-                )
+    def post(self, request):
+        file_obj = request.FILES.get("file", None)
+        if not file_obj:
+            return Response({"error": "No file uploaded."}, status=400)
 
-            # Validate quantity
-            if not isinstance(quantity, int) or quantity < 1:
-                return Response(
-                    {
-                        "error": f"Invalid quantity '{quantity}' in row {i + 4}. Must be a positive integer."
-                    },
-                    status=400,
-                )
+        oversized = oversized_upload_response(file_obj)
+        if oversized:
+            return oversized
 
-            # Process inventory item
-            existing_item = InventoryItem.objects.filter(
-                user=request.user, office=office, item_id=item
-            ).first()
-            if existing_item:
-                existing_item.quantity = quantity
-                existing_item.remarks = remarks or ""
-                existing_item.save()
-                updated_items.append(existing_item.item_id.name)
-            else:
-                imported_items.append(
-                    InventoryItem(
-                        user=request.user,
-                        office=office,
-                        item_id=item,
-                        quantity=quantity,
-                        remarks=remarks or "",
-                        description=description or "",  # Add the description field
-                    )
-                )
+        dry_run = query_flag(request, "dry_run")
+        content_hash = upload_digest(file_obj)
+        if not dry_run:
+            duplicate = duplicate_import_response(request, ImportJob.INVENTORY, content_hash)
+            if duplicate:
+                return duplicate
 
-        # Bulk create new inventory items
-        InventoryItem.objects.bulk_create(imported_items)
+        try:
+            imported_items, updated_items, offices = import_office_workbook(
+                file_obj, request.user, dry_run=dry_run
+            )
+        except InventoryImportError as exc:
+            return Response(exc.detail, status=400)
+
+        result = {
+            "message": "Inventory imported successfully.",
+            "offices": offices,
+            "new_items": len(imported_items),
+            "updated_items": [item.item_id.name for item in updated_items],
+        }
+        if dry_run:
+            result["message"] = "Workbook is valid. Nothing was imported (dry run)."
+            result["dry_run"] = True
+            return Response(result, status=200)
 
-        return Response(
-            {
-                "message": "Inventory imported successfully.",
-                "new_items": len(imported_items),
-                "updated_items": updated_items,
-            },
-            status=201,
-        )
+        record_processed_import(ImportJob.INVENTORY, content_hash, request.user, result)
+        return Response(result, status=201)
+
+class ImportJobView(APIView):
+    """
+    Status of a background import job: progress, counts and errors. Visible to the user
+    who queued it and to admins.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id):
+        job = get_object_or_404(ImportJob, id=job_id)
+        if job.user != request.user and request.user.role not in ("admin", "super_admin"):
+            return Response(
+                {"error": "You do not have permission to view this import job."},
+                status=403,
+            )
+        return Response(ImportJobSerializer(job).data)
 
 # --- Export Inventory View ---
+EXPORTED_BY_PLACEHOLDER = "__EXPORTED_BY__"
+
 class ExportInventoryView(APIView):
     """
     View to export all inventory items to an Excel file with enhanced structure, including item_id.
     """
 
     permission_classes = [IsAuthenticated]
+    content_negotiation_class = ReportContentNegotiation
+    formats = ("xlsx",) + TABULAR_FORMATS
+    layout = ReportLayout(
+        [
+            "S/N",
+            "Item ID",
+            "Item Name",
+            "Quantity",
+            "Description",
+            "Remarks",
+            "Created At",
+            "Updated At",
+        ],
+        # Adjust column widths for better readability
+        column_widths=[10, 15, 30, 10, 30, 30, 20, 20],
+        write_only=True,
+    )
+
+    # Columns of the machine-readable formats: (name, pandas dtype, inventory field)
+    tabular_columns = [
+        ("item_id", "string", "item_id__item_id"),
+        ("item_name", "string", "item_id__name"),
+        ("quantity", "Int64", "quantity"),
+        ("description", "string", "description"),
+        ("remarks", "string", "remarks"),
+        ("created_at", "datetime64[ns, UTC]", "created_at"),
+        ("updated_at", "datetime64[ns, UTC]", "updated_at"),
+    ]
 
     def get(self, request):
         office_id = request.query_params.get("office_id")
+        output_format = request.query_params.get("format", "xlsx")
+        if output_format not in self.formats:
+            return Response(
+                {"error": f"Unsupported format. Choose one of: {', '.join(self.formats)}."},
+                status=400,
+            )
+
+        inventory_items, office, error = self.scope_inventory(request, office_id)
+        if error:
+            return error
 
-        # Debug: Check the office_id value being passed
-        print("Office ID:", office_id)
+        split = request.query_params.get("split")
+        if split and (split != "office" or office or output_format != "xlsx"):
+            return Response(
+                {"error": "split=office is only available for xlsx exports of all offices."},
+                status=400,
+            )
 
+        if output_format != "xlsx":
+            return self.generate_tabular(inventory_items, output_format)
+
+        organization_name = (
+            request.user.organization.name
+            if request.user.organization
+            else "Unknown Organization"
+        )
+
+        if split:
+            return self.generate_office_shards(organization_name, request.user.username)
+
+        # Identical exports (same scope and data version) are rendered once and shared;
+        # staff exports only cover their own rows, so they are keyed per user
+        version, _ = inventory_version(inventory_items)
+        key = (
+            organization_name,
+            office.id if office else None,
+            request.user.id if request.user.role == "staff" else None,
+            version,
+        )
+        cached_file, cache_status = report_cache.open_or_render(
+            "export",
+            office.id if office else "all",
+            key,
+            lambda output: self.render_excel(
+                output, inventory_items, office, organization_name
+            ),
+        )
+
+        # Patch the exporting user's name into the shared workbook as it is sent
+        output = patch_placeholder(
+            cached_file, EXPORTED_BY_PLACEHOLDER, request.user.username
+        )
+        response = xlsx_chunks_response(output, "inventory_items.xlsx")
+        response["X-Report-Cache"] = cache_status
+        return response
+
+    def scope_inventory(self, request, office_id):
+        """
+        Resolve the inventory rows the user may export: staff only their own rows in one of
+        their assigned offices, admins any office or everything.
+        Returns (inventory_items, office, error_response).
+        """
         # For staff users, apply office-related restrictions
         if request.user.role == "staff":
             if not office_id:
-                return Response(
+                return None, None, Response(
                     {"error": "Office ID is required to export inventory."}, status=400
                 )
 
@@ -679,11 +860,8 @@ class ExportInventoryView(APIView):
                 id=office_id, assigned_users=request.user
             ).first()
 
-            # Debug: Check if the office is found for staff
-            print("Staff Office:", office)
-
             if not office:
-                return Response(
+                return None, None, Response(
                     {
                         "error": "You do not have permission to export inventory for this office."
                     },
@@ -700,11 +878,8 @@ class ExportInventoryView(APIView):
                 # Check if the office exists
                 office = Office.objects.filter(id=office_id).first()
 
-                # Debug: Check if the office exists for Admin/Superadmin
-                print("Admin/Superadmin Office:", office)
-
                 if not office:
-                    return Response(
+                    return None, None, Response(
                         {"error": "The specified office does not exist."}, status=404
                     )
 
@@ -715,101 +890,297 @@ class ExportInventoryView(APIView):
                 inventory_items = InventoryItem.objects.all()
                 office = None  # Admins/Superadmins can export for all offices
 
-        # Create the workbook and worksheet
-        # Create the workbook and worksheet
-        workbook = Workbook()
-        sheet = workbook.active
-        sheet.title = "Inventory Items"
+        return inventory_items, office, None
 
-        # Header Font and Alignment
-        header_font = Font(bold=True, size=14)
-        centered_alignment = Alignment(horizontal="center", vertical="center")
+    def generate_tabular(self, inventory_items, output_format):
+        """
+        Stream the inventory rows as CSV, NDJSON or Parquet, read with one joined query in chunks.
+        """
+        rows = (
+            inventory_items.values_list(*(field for _, _, field in self.tabular_columns))
+            .order_by("item_id__name", "id")
+            .iterator(chunk_size=2000)
+        )
+        columns = [(name, dtype) for name, dtype, _ in self.tabular_columns]
+        try:
+            return tabular_response(output_format, columns, rows, "inventory_items")
+        except ImportError:
+            return Response(
+                {"error": "Parquet export requires pyarrow, which is not installed."},
+                status=501,
+            )
 
-        # Add organization name as the first row
-        # Header Font and Alignment
-        header_font = Font(bold=True, size=14)
-        centered_alignment = Alignment(horizontal="center", vertical="center")
+    def generate_office_shards(self, organization_name, exported_by):
+        """
+        Return a zip holding one export workbook per office. Offices are rendered in
+        parallel by a bounded pool of worker processes (`REPORT_WORKERS`).
+        """
+        offices = Office.objects.filter(
+            id__in=InventoryItem.objects.values("office_id")
+        ).order_by("name")
+        with tempfile.TemporaryDirectory() as directory:
+            tasks = [
+                (
+                    office.id,
+                    organization_name,
+                    exported_by,
+                    os.path.join(directory, f"{get_valid_filename(office.name)}.xlsx"),
+                )
+                for office in offices
+            ]
+            paths = run_in_pool(render_office_export, tasks)
 
-        # Add organization name as the first row
-        organization_name = (
-            request.user.organization.name
-            if request.user.organization
-            else "Unknown Organization"
-        )
-        sheet.merge_cells(start_row=1, start_column=1, end_row=1, end_column=8)
-        sheet.cell(row=1, column=1).value = organization_name
-        sheet.cell(row=1, column=1).font = header_font
-        sheet.cell(row=1, column=1).alignment = centered_alignment
+            output = tempfile.TemporaryFile()
+            # Workbooks are already compressed, so they are stored as they are
+            with zipfile.ZipFile(output, "w", zipfile.ZIP_STORED) as archive:
+                for path in paths:
+                    archive.write(path, os.path.basename(path))
+            output.seek(0)
 
+        response = FileResponse(output, content_type="application/zip")
+        response["Content-Disposition"] = "attachment; filename=inventory_by_office.zip"
+        return response
+
+    def render_excel(
+        self,
+        output,
+        inventory_items,
+        office,
+        organization_name,
+        exported_by=EXPORTED_BY_PLACEHOLDER,
+    ):
+        """
+        Write the inventory export workbook into `output`. The footer holds a placeholder for
+        the exporting user unless `exported_by` is given.
+
+        Rows are read with one joined query iterated in chunks and appended to a write-only
+        workbook, which openpyxl streams to disk, so memory stays flat however many rows
+        are exported.
+        """
         # Add office name and department as the second row
         if office:
             office_details = f"Office: {office.name} | Department: {office.department or 'No Department'}"
         else:
             office_details = "All Offices (Admin/Superadmin Export)"
-        sheet.merge_cells(start_row=2, start_column=1, end_row=2, end_column=8)
-        sheet.cell(row=2, column=1).value = office_details
-        sheet.cell(row=2, column=1).font = header_font
-        sheet.cell(row=2, column=1).alignment = centered_alignment
 
-        # Add column headers, including item ID
-        headers = [
-            "S/N",
-            "Item ID",
-            "Item Name",
-            "Quantity",
-            "Description",
-            "Remarks",
-            "Created At",
-            "Updated At",
-        ]
-        sheet.append(headers)
-
-        # Style the column headers
-        # Style the column headers
-        for col_num, header in enumerate(headers, start=1):
-            cell = sheet.cell(row=3, column=col_num)
-            cell = sheet.cell(row=3, column=col_num)
-            cell.font = Font(bold=True)
-            cell.alignment = Alignment(horizontal="center", vertical="center")
-
-        # Add data rows, including descriptions
-        for idx, item in enumerate(inventory_items, start=1):
-            sheet.append(
+        # Add data rows, including descriptions; item fields come from the same joined query
+        rows = inventory_items.values_list(
+            "item_id__item_id",  # item ID from the linked ItemRegister
+            "item_id__name",  # Name from the linked ItemRegister
+            "quantity",
+            "description",
+            "remarks",
+            "created_at",
+            "updated_at",
+        ).order_by("item_id__name", "id")
+        self.layout.render(
+            output,
+            "Inventory Items",
+            [organization_name, office_details],
+            (
                 [
                     idx,
-                    item.item_id.item_id,  # item ID from the linked ItemRegister
-                    item.item_id.name,  # Name from the linked ItemRegister
-                    item.quantity,
-                    item.description or "N/A",  # Include description in the row
-                    item.remarks or "N/A",
-                    item.created_at.strftime("%Y-%m-%d %H:%M:%S"),
-                    item.updated_at.strftime("%Y-%m-%d %H:%M:%S"),
+                    item_code,
+                    name,
+                    quantity,
+                    description or "N/A",  # Include description in the row
+                    remarks or "N/A",
+                    created_at.strftime("%Y-%m-%d %H:%M:%S"),
+                    updated_at.strftime("%Y-%m-%d %H:%M:%S"),
                 ]
-            )
+                for idx, (item_code, name, quantity, description, remarks, created_at, updated_at)
+                in enumerate(rows.iterator(chunk_size=2000), start=1)
+            ),
+            # Add staff name as the footer (patched in per request), after a blank row
+            footer=f"Exported by: {exported_by}",
+        )
 
-        # Add staff name as the footer
-        staff_name = request.user.username
-        sheet.append([])  # Leave a blank row
-        sheet.append([f"Exported by: {staff_name}"])
-        sheet.merge_cells(
-            start_row=sheet.max_row, start_column=1, end_row=sheet.max_row, end_column=8
+def render_office_export(office_id, organization_name, exported_by, path):
+    """
+    Render one office's inventory export into `path` (runs in report worker processes).
+    """
+    office = Office.objects.get(pk=office_id)
+    with open(path, "wb") as output:
+        ExportInventoryView().render_excel(
+            output,
+            InventoryItem.objects.filter(office=office),
+            office,
+            organization_name,
+            exported_by,
         )
-        sheet.cell(row=sheet.max_row, column=1).alignment = centered_alignment
+    return path
 
-        # Adjust column widths for better readability
-        column_widths = [10, 15, 30, 10, 30, 30, 20, 20]
-        for i, width in enumerate(column_widths, start=1):
-            sheet.column_dimensions[chr(64 + i)].width = (
-                width  # Convert 1 to 'A', 2 to 'B', etc.
+
+class InventoryDeltaView(ExportInventoryView):
+    """
+    Incremental export for sync clients: inventory rows changed, and rows deleted, after a cursor.
+
+    `updated_since` takes an ISO 8601 timestamp (first sync) or the `next_cursor` returned by
+    the previous call. Changes are read in (updated_at, id) order through an index and
+    deletions come from the tombstones recorded when rows are deleted. The scoping is the
+    same as the full export.
+
+    Tombstones are kept for `DELTA_TOMBSTONE_RETENTION_DAYS` (see the `prune_tombstones`
+    command); clients that have not synced for longer must start again from a full export.
+
+    Timestamps are set before their transaction commits, so a row can become visible after
+    rows with later timestamps. Only rows older than `DELTA_SETTLE_SECONDS` are returned, and
+    the cursor never moves past that point, so late commits are not skipped.
+    """
+
+    default_limit = 1000
+    max_limit = 5000
+
+    def get(self, request):
+        inventory_items, office, error = self.scope_inventory(
+            request, request.query_params.get("office_id")
+        )
+        if error:
+            return error
+
+        try:
+            changed_after, deleted_after = self.decode_cursor(
+                request.query_params.get("updated_since")
+            )
+            limit = min(
+                max(int(request.query_params.get("limit", self.default_limit)), 1),
+                self.max_limit,
+            )
+        except ValueError:
+            return Response(
+                {"error": "updated_since must be a timestamp or a cursor, limit a number."},
+                status=400,
             )
 
-        # Prepare the response
-        response = HttpResponse(
-            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        tombstones = InventoryTombstone.objects.all()
+        if office:
+            tombstones = tombstones.filter(office_id=office.id)
+        if request.user.role == "staff":
+            tombstones = tombstones.filter(user_id=request.user.id)
+
+        settled = timezone.now() - timedelta(seconds=settings.DELTA_SETTLE_SECONDS)
+        inventory_items = inventory_items.filter(updated_at__lte=settled)
+        tombstones = tombstones.filter(deleted_at__lte=settled)
+
+        # One row past the limit tells whether another page follows
+        changes = list(
+            self.after(inventory_items, "updated_at", changed_after).values(
+                "id",
+                "item_id__item_id",
+                "item_id__name",
+                "office_id",
+                "office__name",
+                "quantity",
+                "description",
+                "remarks",
+                "year",
+                "created_at",
+                "updated_at",
+            )[: limit + 1]
         )
-        response["Content-Disposition"] = "attachment; filename=inventory_items.xlsx"
-        workbook.save(response)
-        return response
+        deletions = list(
+            self.after(tombstones, "deleted_at", deleted_after).values(
+                "id", "inventory_item_id", "deleted_at"
+            )[: limit + 1]
+        )
+        has_more = len(changes) > limit or len(deletions) > limit
+        changes, deletions = changes[:limit], deletions[:limit]
+        if changes:
+            changed_after = (changes[-1]["updated_at"], changes[-1]["id"])
+        if deletions:
+            deleted_after = (deletions[-1]["deleted_at"], deletions[-1]["id"])
+
+        return Response(
+            {
+                "changes": [
+                    {
+                        "id": row["id"],
+                        "item_id": row["item_id__item_id"],
+                        "item_name": row["item_id__name"],
+                        "office_id": row["office_id"],
+                        "office": row["office__name"],
+                        "quantity": row["quantity"],
+                        "description": row["description"],
+                        "remarks": row["remarks"],
+                        "year": row["year"],
+                        "created_at": row["created_at"],
+                        "updated_at": row["updated_at"],
+                    }
+                    for row in changes
+                ],
+                "deletions": [
+                    {"id": row["inventory_item_id"], "deleted_at": row["deleted_at"]}
+                    for row in deletions
+                ],
+                "next_cursor": self.encode_cursor(changed_after, deleted_after),
+                "has_more": has_more,
+            },
+            status=200,
+        )
+
+    @staticmethod
+    def after(queryset, field, position):
+        """
+        Rows strictly after a (timestamp, id) keyset position, in that order.
+        """
+        timestamp, pk = position
+        queryset = queryset.order_by(field, "id")
+        if timestamp is None:
+            return queryset
+        return queryset.filter(
+            Q(**{f"{field}__gt": timestamp}) | Q(**{field: timestamp, "id__gt": pk})
+        )
+
+    @staticmethod
+    def encode_cursor(changed_after, deleted_after):
+        positions = [
+            [timestamp.isoformat() if timestamp else None, pk]
+            for timestamp, pk in (changed_after, deleted_after)
+        ]
+        return base64.urlsafe_b64encode(json.dumps(positions).encode()).decode()
+
+    @staticmethod
+    def decode_cursor(value):
+        """
+        Return the (changes, deletions) keyset positions for an `updated_since` value.
+        Raises ValueError for anything that is neither a cursor nor a timestamp.
+        """
+        if not value:
+            return (None, 0), (None, 0)
+
+        timestamp = parse_datetime(value)
+        if timestamp is not None:
+            if timezone.is_naive(timestamp):
+                timestamp = timezone.make_aware(timestamp)
+            return (timestamp, 0), (timestamp, 0)
+
+        try:
+            positions = json.loads(base64.urlsafe_b64decode(value.encode()))
+        except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError) as exc:
+            raise ValueError("Invalid cursor.") from exc
+
+        # Exactly two [timestamp or null, id] pairs, as written by `encode_cursor`
+        if not (
+            isinstance(positions, list)
+            and len(positions) == 2
+            and all(
+                isinstance(position, list)
+                and len(position) == 2
+                and isinstance(position[0], (str, type(None)))
+                and type(position[1]) is int
+                for position in positions
+            )
+        ):
+            raise ValueError("Invalid cursor.")
+
+        decoded = []
+        for timestamp, pk in positions:
+            if timestamp is not None:
+                timestamp = parse_datetime(timestamp)
+                if timestamp is None:
+                    raise ValueError("Invalid cursor.")
+            decoded.append((timestamp, pk))
+        return tuple(decoded)
 
 class BroadsheetView(APIView):
     """
@@ -817,67 +1188,140 @@ class BroadsheetView(APIView):
     """
 
     permission_classes = [IsAuthenticated, IsAdminOrSuperAdmin]
+    content_negotiation_class = ReportContentNegotiation
+    formats = ("xlsx", "json", "csv")
+    max_compare_years = 5
 
     def get(self, request, *args, **kwargs):
-        year = request.GET.get("year", None)
-        if not year:
-            return Response({"error": "Year parameter is required."}, status=400)
+        # `years=2024,2025` compares several years in one pass; otherwise a single `year`
+        if request.GET.get("years"):
+            try:
+                years = sorted({int(year) for year in request.GET["years"].split(",")})
+            except ValueError:
+                return Response(
+                    {"error": "Years must be a comma separated list of numbers."}, status=400
+                )
+            if not 2 <= len(years) <= self.max_compare_years:
+                return Response(
+                    {"error": f"Provide between 2 and {self.max_compare_years} years to compare."},
+                    status=400,
+                )
+        else:
+            year = request.GET.get("year", None)
+            if not year:
+                return Response({"error": "Year parameter is required."}, status=400)
+            try:
+                years = [int(year)]
+            except ValueError:
+                return Response({"error": "Year must be a number."}, status=400)
+
+        output_format = request.GET.get("format", "xlsx")
+        if output_format not in self.formats:
+            return Response(
+                {"error": f"Unsupported format. Choose one of: {', '.join(self.formats)}."},
+                status=400,
+            )
+
+        # Answer conditional requests from the data version, before any aggregation
+        version, last_modified = broadsheet_version(*years)
+        etag = self.get_etag(version, output_format, years)
+        last_modified = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            if len(years) > 1:
+                response = self.generate_comparison(years, output_format)
+            else:
+                response = self.generate(years[0], output_format, version)
+        response["ETag"] = etag
+        if last_modified:
+            response["Last-Modified"] = http_date(last_modified)
+        return response
+
+    def get_etag(self, version, output_format, years):
+        """
+        Build the ETag of a broadsheet representation from its data version.
+        """
+        years = ",".join(str(year) for year in years)
+        return quote_etag(
+            hashlib.sha1(
+                f"{version}:{output_format}:{years}:{self.get_organization_name()}".encode()
+            ).hexdigest()
+        )
+
+    def generate(self, year, output_format, version):
+        """
+        Aggregate the year's data and render it in the requested format.
+        """
+        if output_format == "xlsx":
+            return self.generate_excel(year, version)
 
-        # Aggregate inventory data and department-office mapping
+        # Aggregate inventory data, department-office mapping and valuation
         inventory_data = self.aggregate_inventory_data(year)
         department_offices = self.get_department_offices(year)
+        valuation = broadsheet_valuation(year)
 
-        # Generate Excel file
-        return self.generate_excel(inventory_data, department_offices, year)
+        if output_format == "json":
+            return self.generate_json(inventory_data, department_offices, valuation, year)
+        return self.generate_csv(inventory_data, department_offices, year)
 
     def aggregate_inventory_data(self, year):
         """
-        Fetch and group inventory data by unique items across offices, including item_id and descriptions.
+        Fetch inventory totals by unique items across offices from the precomputed summary table,
+        including item_id and descriptions.
         """
         return (
-            InventoryItem.objects.filter(year=year)
+            BroadsheetSummary.objects.filter(year=year)
             .values(
-                "item_id__item_id",  # item ID from ItemRegister
-                "item_id__name",  # Item name from ItemRegister
+                "item__item_id",  # item ID from ItemRegister
+                "item__name",  # Item name from ItemRegister
                 "office__name",  # Office name
                 "office__department",  # Department
-                "item_id__description",  # Item description
-                "item_id__unit_cost",  # Unit cost from ItemRegister
+                "item__description",  # Item description
+                "item__unit_cost",  # Unit cost from ItemRegister
+                "total_quantity",  # Precomputed sum of quantities
+                value=value_expression(),  # Quantity x unit cost, computed in the database
             )
-            .annotate(total_quantity=Sum("quantity"))
-            .distinct()
-            .order_by("item_id__name")  # Order items alphabetically by name
+            .order_by("item__name")  # Order items alphabetically by name
         )
 
-    def get_department_offices(self, year):
+    def aggregate_comparative_data(self, years):
         """
-        Fetch all unique departments and their associated offices without duplicates.
+        Fetch per item, office and year totals for several years in one grouped query over
+        the summary table, ordered by item so they can be pivoted in a single pass.
         """
-        departments = (
-            InventoryItem.objects.filter(year=year)
-            .values_list("office__department", flat=True)
+        return (
+            BroadsheetSummary.objects.filter(year__in=years)
+            .values(
+                "item__item_id",
+                "item__name",
+                "item__description",
+                "office__name",
+                "year",
+                "total_quantity",
+            )
+            .order_by("item__name", "item__item_id")
+        )
+
+    def get_department_offices(self, *years):
+        """
+        Fetch all unique departments and their associated offices without duplicates,
+        using a single grouped query. Offices of every given year are included.
+        """
+        department_office_pairs = (
+            BroadsheetSummary.objects.filter(year__in=years)
+            .values_list("office__department", "office__name")
             .distinct()
+            .order_by("office__department", "office__name")
         )
         department_offices = {}
-        for dept in departments:
-            offices = (
-                InventoryItem.objects.filter(office__department=dept, year=year)
-                .values_list("office__name", flat=True)
-                .distinct()
-            )
-            department_offices[dept] = sorted(set(offices))  # Ensure unique and sorted
+        for dept, office in department_office_pairs:
+            department_offices.setdefault(dept, []).append(office)  # Unique and sorted
         return department_offices
 
-    def generate_excel(self, inventory_data, department_offices, year):
+    def get_organization_name(self):
         """
-        Generate and return the broadsheet as an Excel file.
+        Fetch the organization name dynamically from user profile or directly from user.
         """
-        workbook = Workbook()
-        sheet = workbook.active
-        sheet.title = "Broadsheet"
-
-        # Organization and subheading
-        # Fetch the organization name dynamically from user profile or directly from user
         organization_name = (
             getattr(self.request.user.profile, "organization_name", None)
             if hasattr(self.request.user, "profile")
@@ -892,186 +1336,259 @@ class BroadsheetView(APIView):
             organization_name = (
                 organization.name if organization else "Unknown Organization"
             )
-        num_office_columns = sum(
-            len(offices) for offices in department_offices.values()
-        )
-        num_columns = 7 + num_office_columns  # Updated for two new columns
+        return organization_name
 
-        # Header: Organization Name
-        sheet.merge_cells(
-            start_row=1, start_column=1, end_row=1, end_column=num_columns
-        )
-        sheet.cell(row=1, column=1, value=organization_name.upper()).font = Font(
-            size=21, bold=True
+    def generate_json(self, inventory_data, department_offices, valuation, year):
+        """
+        Return the broadsheet data, valuation and subtotals as JSON.
+        """
+        department_values, grand_total = valuation
+        pivot = BroadsheetPivot(inventory_data, department_offices)
+        items = [
+            {
+                "item_id": item["item_id"],
+                "name": item["name"],
+                "description": item["description"] or "N/A",
+                "quantities": {
+                    office: quantity
+                    for office, quantity in zip(pivot.offices, quantities)
+                    if quantity is not None
+                },
+                "total_quantity": total_quantity,
+                "unit_cost": str(item["unit_cost"]),
+                "total_value": str(item["total_value"]),
+            }
+            for item, quantities, total_quantity in pivot.rows()
+        ]
+        return Response(
+            {
+                "organization": self.get_organization_name(),
+                "year": year,
+                "departments": [
+                    {
+                        "department": department,
+                        "offices": offices,
+                        "total_value": str(department_values.get(department, 0)),
+                    }
+                    for department, offices in department_offices.items()
+                ],
+                "items": items,
+                "grand_total": str(grand_total),
+            },
+            status=200,
         )
-        sheet.cell(row=1, column=1).alignment = Alignment(horizontal="center")
 
-        # Subheading: Year
-        sheet.merge_cells(
-            start_row=2, start_column=1, end_row=2, end_column=num_columns
+    def generate_csv(self, inventory_data, department_offices, year):
+        """
+        Stream the pivoted broadsheet rows as CSV.
+        """
+        pivot = BroadsheetPivot(
+            inventory_data.iterator(chunk_size=2000), department_offices
         )
-        sheet.cell(
-            row=2, column=1, value=f"Inventory Data for the Year {year}"
-        ).font = Font(size=17, italic=True)
-        sheet.cell(row=2, column=1).alignment = Alignment(horizontal="center")
-
-        # Headers
-        sheet.append(
-            ["S/N", "ITEM ID", "ITEM NAME", "DESCRIPTION", "TOTAL"]
-            + [
-                f"{office}"
-                for offices in department_offices.values()
-                for office in offices
-            ]
-            + ["UNIT", "TOTAL VALUE"]
+        header = (
+            ["S/N", "ITEM ID", "ITEM NAME", "DESCRIPTION"]
+            + pivot.offices
+            + ["TOTAL", "UNIT", "VALUE"]
         )
-        header_row = sheet.max_row
-
-        # Apply bold font to all cells in the header row
-        for cell in sheet[header_row]:
-            cell.font = Font(bold=True)
-
-        # Merge cells for the label rows
-        for col in range(1, 5):
-            sheet.merge_cells(
-                start_row=header_row,
-                start_column=col,
-                end_row=header_row + 1,
-                end_column=col,
+        rows = (
+            [serial_number, item["item_id"], item["name"], item["description"] or "N/A"]
+            + ["" if quantity is None else quantity for quantity in quantities]
+            + [total_quantity, item["unit_cost"], item["total_value"]]
+            for serial_number, (item, quantities, total_quantity) in enumerate(
+                pivot.rows(), start=1
             )
-            sheet.cell(row=header_row, column=col).alignment = Alignment(
-                horizontal="center", vertical="center"
+        )
+        return streaming_csv_response(header, rows, f"broadsheet_{year}.csv")
+
+    def generate_comparison(self, years, output_format):
+        """
+        Pivot several years together and render them with per-year change columns.
+        """
+        department_offices = self.get_department_offices(*years)
+        pivot = ComparativePivot(
+            self.aggregate_comparative_data(years).iterator(chunk_size=2000),
+            department_offices,
+            years,
+        )
+        years_label = "_".join(str(year) for year in years)
+
+        if output_format == "json":
+            changes = [f"{previous}-{current}" for previous, current in pivot.changes]
+            items = []
+            for item, quantities, totals in pivot.rows():
+                item["description"] = item["description"] or "N/A"
+                item["quantities"] = {
+                    office: dict(zip(years, values))
+                    for office, values in zip(pivot.offices, quantities)
+                    if any(value is not None for value in values)
+                }
+                item["changes"] = {
+                    office: dict(zip(changes, year_changes(values)))
+                    for office, values in zip(pivot.offices, quantities)
+                    if any(value is not None for value in values)
+                }
+                item["totals"] = dict(zip(years, totals))
+                item["total_changes"] = dict(zip(changes, year_changes(totals)))
+                items.append(item)
+            return Response(
+                {
+                    "organization": self.get_organization_name(),
+                    "years": years,
+                    "departments": [
+                        {"department": department, "offices": offices}
+                        for department, offices in department_offices.items()
+                    ],
+                    "items": items,
+                },
+                status=200,
             )
 
-        # Add department and office headers
-        col_index = 5
-        for department, offices in department_offices.items():
-            start_col = col_index
-            for office in offices:
-                sheet.cell(row=header_row + 1, column=col_index, value=office)
-                sheet.cell(row=header_row + 1, column=col_index).alignment = Alignment(
-                    textRotation=90, horizontal="center"
+        if output_format == "csv":
+            block_labels = [str(year) for year in years] + [
+                f"CHANGE {previous}-{current}" for previous, current in pivot.changes
+            ]
+            header = ["S/N", "ITEM ID", "ITEM NAME", "DESCRIPTION"] + [
+                f"{office} {label}"
+                for office in pivot.offices + ["TOTAL"]
+                for label in block_labels
+            ]
+            rows = (
+                [serial_number, item["item_id"], item["name"], item["description"] or "N/A"]
+                + [
+                    "" if value is None else value
+                    for values in quantities + [totals]
+                    for value in values + year_changes(values)
+                ]
+                for serial_number, (item, quantities, totals) in enumerate(
+                    pivot.rows(), start=1
                 )
-                col_index += 1
-            sheet.merge_cells(
-                start_row=header_row,
-                start_column=start_col,
-                end_row=header_row,
-                end_column=col_index - 1,
-            )
-            sheet.cell(row=header_row, column=start_col).value = department
-            sheet.cell(row=header_row, column=start_col).alignment = Alignment(
-                horizontal="center", vertical="center"
             )
+            return streaming_csv_response(header, rows, f"broadsheet_{years_label}.csv")
 
-        # Format TOTAL, UNIT, TOTAL VALUE labels
-        total_cell = sheet.cell(row=header_row, column=col_index, value="TOTAL")
-        total_cell.font = Font(name="Times New Roman", size=12, bold=True)
-        total_cell.alignment = Alignment(textRotation=90, horizontal="center")
-        sheet.merge_cells(
-            start_row=header_row,
-            start_column=col_index,
-            end_row=header_row + 1,
-            end_column=col_index,
+        return streaming_xlsx_response(
+            lambda output: write_comparative_broadsheet(
+                output, self.get_organization_name(), pivot
+            ),
+            f"broadsheet_{years_label}.xlsx",
         )
 
-        unit_cell = sheet.cell(row=header_row, column=col_index + 1, value="UNIT")
-        unit_cell.font = Font(name="Times New Roman", size=12, bold=True)
-        unit_cell.alignment = Alignment(horizontal="center", vertical="center")
-        sheet.merge_cells(
-            start_row=header_row,
-            start_column=col_index + 1,
-            end_row=header_row + 1,
-            end_column=col_index + 1,
+    def generate_excel(self, year, version):
+        """
+        Return the broadsheet Excel file, rendering it only when the cache has no copy
+        for this year, organization and data version. Concurrent identical requests share
+        a single render.
+        """
+        key = (year, self.get_organization_name(), version)
+        cached_file, cache_status = report_cache.open_or_render(
+            "broadsheet", year, key, lambda output: self.render_excel(output, year)
         )
 
-        total_value_cell = sheet.cell(
-            row=header_row, column=col_index + 2, value="VALUE"
+        response = xlsx_file_response(cached_file, f"broadsheet_{year}.xlsx")
+        response["X-Report-Cache"] = cache_status
+        return response
+
+    def render_excel(self, output, year):
+        """
+        Aggregate the year's data and write the broadsheet workbook into `output`.
+        """
+        department_offices = self.get_department_offices(year)
+        valuation = broadsheet_valuation(year)
+        pivot = BroadsheetPivot(
+            self.aggregate_inventory_data(year).iterator(chunk_size=2000),
+            department_offices,
         )
-        total_value_cell.font = Font(name="Times New Roman", size=12, bold=True)
-        total_value_cell.alignment = Alignment(horizontal="center", vertical="center")
-        sheet.merge_cells(
-            start_row=header_row,
-            start_column=col_index + 2,
-            end_row=header_row + 1,
-            end_column=col_index + 2,
+        write_broadsheet(
+            output, self.get_organization_name(), year, department_offices, pivot, valuation
         )
 
-        # Write data rows
-        unique_items = inventory_data.values(
-            "item_id__item_id",
-            "item_id__name",
-            "item_id__description",
-            "item_id__unit_cost",
-        ).distinct()
-        row_index = sheet.max_row + 1
-        serial_number = 1
-        for item in unique_items:
-            item_id = item["item_id__item_id"]
-            item_name = item["item_id__name"]
-            description = item["item_id__description"]
-            unit_cost = item["item_id__unit_cost"] or 0
-
-            # Write S/N column
-            sheet.cell(row=row_index, column=1, value=serial_number).alignment = (
-                Alignment(horizontal="center")
-            )
 
-            # Write item ID, Item Name, Description
-            sheet.cell(row=row_index, column=2, value=item_id)
-            sheet.cell(row=row_index, column=3, value=item_name)
-            sheet.cell(row=row_index, column=4, value=description or "N/A")
-
-            # Map quantities for each office
-            col_index = 5
-            total_quantity = 0
-            for department, offices in department_offices.items():
-                for office in offices:
-                    quantity = next(
-                        (
-                            row["total_quantity"]
-                            for row in inventory_data
-                            if row["item_id__item_id"] == item_id
-                            and row["office__name"] == office
-                        ),
-                        None,  # Use None for missing data
-                    )
-                    sheet.cell(row=row_index, column=col_index, value=quantity)
-                    sheet.cell(row=row_index, column=col_index).alignment = Alignment(
-                        horizontal="center"
-                    )
-                    total_quantity += quantity or 0
-                    col_index += 1
+class BroadsheetWindowView(BroadsheetView):
+    """
+    API returning one window of the broadsheet pivot (a range of item rows and a range of
+    office columns) as JSON, for virtualized grids that only load the visible cells.
 
-            # Write Total column
-            total_cell = sheet.cell(
-                row=row_index, column=col_index, value=total_quantity
-            )
-            total_cell.alignment = Alignment(horizontal="center")
+    The column layout and the ordered items with their totals come from `broadsheet_layout`,
+    cached under the data version, so a window only slices them and fetches its own cells
+    from the precomputed summary table.
+    """
 
-            # Write UNIT column (empty/null)
-            unit_cell = sheet.cell(row=row_index, column=col_index + 1, value=None)
-            unit_cell.alignment = Alignment(horizontal="center")
+    window_limits = {"row_limit": (100, 500), "col_limit": (20, 100)}
 
-            # Write Total Value column (empty if UNIT is empty)
-            total_value_cell = sheet.cell(
-                row=row_index, column=col_index + 2, value=None
+    def get(self, request, *args, **kwargs):
+        year = request.GET.get("year", None)
+        if not year:
+            return Response({"error": "Year parameter is required."}, status=400)
+        try:
+            year = int(year)
+            row_offset = max(int(request.GET.get("row_offset", 0)), 0)
+            col_offset = max(int(request.GET.get("col_offset", 0)), 0)
+            row_limit, col_limit = (
+                min(max(int(request.GET.get(name, default)), 1), maximum)
+                for name, (default, maximum) in self.window_limits.items()
+            )
+        except ValueError:
+            return Response(
+                {"error": "Year, offsets and limits must be numbers."}, status=400
             )
-            total_value_cell.alignment = Alignment(horizontal="center")
-
-            row_index += 1
-            serial_number += 1
 
-        # Adjust column widths
-        for col in range(1, num_columns + 1):
-            sheet.column_dimensions[get_column_letter(col)].width = 20
+        window = f"window:{row_offset}:{row_limit}:{col_offset}:{col_limit}"
+        version, last_modified = broadsheet_version(year)
+        etag = self.get_etag(version, window, [year])
+        last_modified = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = self.generate_window(
+                year, version, row_offset, row_limit, col_offset, col_limit
+            )
+        response["ETag"] = etag
+        if last_modified:
+            response["Last-Modified"] = http_date(last_modified)
+        return response
 
-        # Prepare the response
-        response = HttpResponse(
-            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    def generate_window(self, year, version, row_offset, row_limit, col_offset, col_limit):
+        """
+        Build the JSON for one window of the year's pivot.
+        """
+        columns, items = broadsheet_layout(year, version)
+        window_columns = [
+            {"department": department, "office": office}
+            for department, office in columns[col_offset:col_offset + col_limit]
+        ]
+        column_index = {column["office"]: col for col, column in enumerate(window_columns)}
+        page = items[row_offset:row_offset + row_limit]
+
+        quantities = {item[0]: [None] * len(window_columns) for item in page}
+        if page and window_columns:
+            cells = BroadsheetSummary.objects.filter(
+                year=year, item__in=quantities, office__name__in=column_index
+            ).values_list("item_id", "office__name", "total_quantity")
+            for item_pk, office, total_quantity in cells:
+                col = column_index[office]
+                quantities[item_pk][col] = (quantities[item_pk][col] or 0) + total_quantity
+
+        rows = [
+            {
+                "serial_number": serial_number,
+                "item_id": item_id,
+                "name": name,
+                "description": description or "N/A",
+                "quantities": quantities[pk],
+                "total_quantity": total_quantity,
+                "unit_cost": str(money(unit_cost)),
+                "total_value": str(money(total_quantity * unit_cost)),
+            }
+            for serial_number, (pk, item_id, name, description, unit_cost, total_quantity) in
+            enumerate(page, start=row_offset + 1)
+        ]
+        return Response(
+            {
+                "year": year,
+                "total_rows": len(items),
+                "total_columns": len(columns),
+                "row_offset": row_offset,
+                "col_offset": col_offset,
+                "columns": window_columns,
+                "rows": rows,
+            },
+            status=200,
         )
-        response["Content-Disposition"] = f"attachment; filename=broadsheet_{year}.xlsx"
-        workbook.save(response)
-
-        # Return the response
-        return response